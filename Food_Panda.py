@@ -1,90 +1,330 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+import tkinter.font as tkfont
 from datetime import datetime
+import argparse
+import os
 import random
+import time
 
-class Order:
-    """Order class to represent each order"""
-    def __init__(self, order_id, items, is_vip=False):
-        self.order_id = order_id
-        self.items = items
-        self.is_vip = is_vip
-        self.timestamp = datetime.now()
-    
-    def __str__(self):
-        vip_indicator = " ⭐" if self.is_vip else ""
-        return f"Order #{self.order_id}{vip_indicator}: {self.items}"
+# The queue core lives in order_queue, which does not need tkinter
+from order_queue import (
+    PRIORITY_VIP, PRIORITY_EXPRESS, PRIORITY_NORMAL, PRIORITY_BULK, PRIORITY_NAMES,
+    DEFAULT_SLA_SECONDS, DEFAULT_PREP_SECONDS, SCHEDULING_PRIORITY, SCHEDULING_EDF,
+    linear_aging, QTY_PREFIX, QTY_SUFFIX, split_quantity, MenuCatalog, epoch_to_monotonic_ns,
+    monotonic_ns_to_epoch, Order, QueueEntry, OrderLane, OrderQueueManager, format_wait
+)
 
-class OrderQueueManager:
-    """Manages the order queue with priority handling"""
-    def __init__(self):
-        self.queue = []
-        self.next_order_id = 1001  # Starting order ID
-    
-    def add_order(self, items, is_vip=False):
-        """Add an order to the queue with VIP priority"""
-        order = Order(self.next_order_id, items, is_vip)
-        self.next_order_id += 1
-        
-        if not is_vip:
-            # Normal orders go to the end
-            self.queue.append(order)
-        else:
-            # VIP orders go before all normal orders
-            # Find the position after the last VIP order
-            insert_index = 0
-            for i, existing_order in enumerate(self.queue):
-                if not existing_order.is_vip:
-                    insert_index = i
-                    break
-                insert_index = i + 1
-            self.queue.insert(insert_index, order)
+class NotificationPanel:
+    """Non-blocking notifications: an auto-expiring toast line and an event log
+    
+    Each event type has a mode: "toast" shows it in the toast line and the
+    log, "log" only logs it, "dialog" also pops a modal messagebox and None
+    drops it. Repeats of one event less than COALESCE_MS apart are merged
+    into a single toast and log line ("12 orders processed").
+    """
+    # How long a toast stays up (ms)
+    TOAST_MS = 4000
+    # Repeats of an event closer together than this are one burst (ms)
+    COALESCE_MS = 2000
+    # Lines kept in the event log
+    LOG_SIZE = 200
+    
+    def __init__(self, root, parent, modes, bg, fg, fonts):
+        self.root = root
+        self.modes = modes
+        
+        self.toast_label = tk.Label(
+            parent,
+            text="",
+            font=fonts["small_bold"],
+            bg=bg,
+            fg=fg,
+            anchor=tk.W
+        )
+        self.toast_label.pack(fill=tk.X, pady=(10, 0))
+        self.toast_after = None
+        
+        log_frame = tk.LabelFrame(
+            parent,
+            text="Event Log",
+            font=fonts["body_bold"],
+            bg=bg,
+            fg=fg,
+            padx=10,
+            pady=5
+        )
+        log_frame.pack(fill=tk.X, pady=(10, 0))
+        self.log = tk.Listbox(
+            log_frame,
+            height=4,
+            font=fonts["status"],
+            relief=tk.FLAT,
+            activestyle=tk.NONE
+        )
+        self.log.pack(fill=tk.X)
         
-        return order
+        # The burst the newest log line belongs to
+        self.burst_event = None
+        self.burst_count = 0
+        self.burst_time = 0.0
     
-    def process_next_order(self):
-        """Process the order at the front of the queue"""
-        if not self.queue:
-            return None
+    def notify(self, event, message, burst_message=None, title="Food Panda", count=1):
+        """Report an event without blocking
+        
+        `burst_message` is a format string with a {count} field used when
+        the event repeats in a burst; events without one never coalesce.
+        `count` reports several occurrences at once, e.g. a batch.
+        """
+        mode = self.modes.get(event, "log")
+        if mode is None:
+            return
         
-        return self.queue.pop(0)
+        now = time.monotonic()
+        in_burst = (burst_message is not None and event == self.burst_event
+                    and (now - self.burst_time) * 1000 < self.COALESCE_MS)
+        self.burst_count = self.burst_count + count if in_burst else count
+        self.burst_event = event
+        self.burst_time = now
+        text = burst_message.format(count=self.burst_count) if self.burst_count > 1 else message
+        
+        # A burst keeps rewriting its own log line instead of adding lines
+        if in_burst:
+            self.log.delete(0)
+        self.log.insert(0, f"{datetime.now().strftime('%H:%M:%S')}  {text}")
+        if self.log.size() > self.LOG_SIZE:
+            self.log.delete(self.LOG_SIZE, tk.END)
+        
+        if mode == "toast":
+            self.show_toast(text)
+        elif mode == "dialog":
+            messagebox.showinfo(title, message)
     
-    def get_queue(self):
-        """Return the current queue"""
-        return self.queue.copy()
+    def show_toast(self, text):
+        """Show text in the toast line until TOAST_MS passes without another toast"""
+        self.toast_label.config(text=text)
+        if self.toast_after is not None:
+            self.root.after_cancel(self.toast_after)
+        self.toast_after = self.root.after(self.TOAST_MS, self.expire_toast)
     
-    def is_empty(self):
-        """Check if queue is empty"""
-        return len(self.queue) == 0
+    def expire_toast(self):
+        self.toast_after = None
+        self.toast_label.config(text="")
+
+
+class RefreshScheduler:
+    """Coalesces GUI redraws: parts are marked dirty and redrawn once per frame
     
-    def clear_queue(self):
-        """Clear the entire queue"""
-        self.queue.clear()
+    `painters` maps each part name to the method that redraws it, in the
+    order they should run. A part marked dirty any number of times within a
+    frame is redrawn once; stats() counts the redraws this saved.
+    """
+    # Minimum time between redraws (ms), about one 60 Hz frame
+    FRAME_MS = 16
+    
+    def __init__(self, root, painters):
+        self.root = root
+        self.painters = painters
+        self.dirty = set()
+        self.pending = None  # after() ID of the scheduled flush
+        self.last_flush = 0.0
+        
+        # Instrumentation
+        self.requested = dict.fromkeys(painters, 0)
+        self.redrawn = dict.fromkeys(painters, 0)
+        self.frames = 0
+    
+    def mark(self, *parts):
+        """Schedule a redraw of these parts"""
+        for part in parts:
+            self.requested[part] += 1
+        self.dirty.update(parts)
+        if self.pending is not None:
+            return
+        
+        # Redraw as soon as Tk is idle, but no sooner than a frame after
+        # the last redraw
+        wait = self.FRAME_MS - (time.monotonic() - self.last_flush) * 1000
+        if wait <= 0:
+            self.pending = self.root.after_idle(self.flush)
+        else:
+            self.pending = self.root.after(int(wait) + 1, self.flush)
+    
+    def is_dirty(self, part):
+        return part in self.dirty
+    
+    def flush(self):
+        """Redraw every dirty part now"""
+        if self.pending is not None:
+            self.root.after_cancel(self.pending)
+            self.pending = None
+        dirty, self.dirty = self.dirty, set()
+        for part, painter in self.painters.items():
+            if part in dirty:
+                painter()
+                self.redrawn[part] += 1
+        self.frames += 1
+        self.last_flush = time.monotonic()
+    
+    def stats(self):
+        """Return the redraw counters"""
+        requested = sum(self.requested.values())
+        redrawn = sum(self.redrawn.values())
+        return {
+            "requested": requested,
+            "redrawn": redrawn,
+            "avoided": requested - redrawn,
+            "frames": self.frames,
+            "by_part": {
+                part: (self.requested[part], self.redrawn[part]) for part in self.painters
+            },
+        }
+
 
 class FoodPandaGUI:
     """GUI for the Food Panda Order Queue Manager"""
-    def __init__(self, root):
+    # Above this many queued orders the queue panel only renders the rows in view
+    VIRTUAL_THRESHOLD = 1000
+    # Rows rendered past the configured tree height, so a taller panel has no gap
+    VIRTUAL_OVERSCAN = 10
+    
+    # How often pending write-ahead log records are fsynced while idle (ms)
+    WAL_SYNC_MS = 200
+    # How often to check for orders queued by other clients of the service (ms)
+    POLL_MS = 250
+    # How often auto-dispatch checks for due orders and free stations (ms)
+    AUTO_DISPATCH_MS = 100
+    # How often wait times and throughput are refreshed while idle (ms)
+    METRICS_MS = 1000
+    # How often dispatched orders still buffered for the history store are written (ms)
+    HISTORY_FLUSH_MS = 1000
+    # History rows fetched per page as the history tab is scrolled
+    HISTORY_PAGE = 100
+    
+    # How each notification is shown; see NotificationPanel for the modes
+    NOTIFICATION_MODES = {
+        "input_error": "toast",
+        "no_selection": "toast",
+        "queue_empty": "toast",
+        "order_added": "log",
+        "vip_added": "toast",
+        "order_processed": "toast",
+        "auto_dispatch": "log",
+        "order_cancelled": "log",
+        "order_promoted": "log",
+        "not_promoted": "toast",
+        "queue_cleared": "log",
+    }
+    
+    def __init__(self, root, service=None, wal=None, history=None):
         self.root = root
         self.root.title("Food Panda Order Queue Manager")
-        self.root.geometry("1000x700")
+        self.root.geometry("1100x800")
         self.root.configure(bg="#f5f5f5")
         
-        # Initialize queue manager
-        self.queue_manager = OrderQueueManager()
+        # The GUI is one client of the order service; the HTTP ingest
+        # endpoint may change the same queue from other threads
+        if service is None:
+            from order_service import OrderService
+            service = OrderService()
+        self.service = service
+        self.queue_manager = service.manager
+        self.wal = wal
+        self.history = history
+        
+        # History tab paging: filters of the current search, last row shown
+        # (the cursor for the next page), and whether every row is shown
+        self.history_filters = {}
+        self.history_last = None
+        self.history_done = True
+        self.history_load_pending = False
+        
+        # Queue version the display was last brought up to date with
+        self.displayed_version = None
+        
+        # Virtual scrolling state: queue position of the first rendered row
+        self.virtual_mode = False
+        self.view_start = 0
+        
+        # Auto-dispatch state: orders owed by the dispatch rate so far. Free-
+        # station signals are held by the service (see station_free).
+        self.dispatch_credit = 0.0
+        self.last_auto_tick = time.monotonic()
         
         # Set up the GUI
         self.setup_styles()
         self.create_widgets()
+        
+        # Parts of the window redrawn at most once per frame after changes
+        self.refresh = RefreshScheduler(self.root, {
+            "queue": self.update_queue_display,
+            "buttons": self.update_process_button_state,
+            "stats": self.update_statistics,
+            "next_id": self.update_next_id,
+        })
         self.update_queue_display()
         
         # Start with process button disabled
         self.update_process_button_state()
         
-        # Track VIP notifications to avoid repeated alerts
-        self.last_vip_notified = None
+        # The panels the first frame can do without are built once it is
+        # drawn. The status bar is not exposed if the window is too short
+        # to show it, so this waits for the window to be mapped instead.
+        self.root.bind("<Map>", self.on_first_map)
+        
+        if self.wal is not None:
+            self.root.after(self.WAL_SYNC_MS, self.sync_wal)
+        if self.history is not None:
+            self.root.after(self.HISTORY_FLUSH_MS, self.flush_history)
+        self.root.after(self.POLL_MS, self.poll_queue_changes)
+        self.root.after(self.AUTO_DISPATCH_MS, self.auto_dispatch_tick)
+        self.root.after(self.METRICS_MS, self.refresh_metrics)
+    
+    def sync_wal(self):
+        """Flush write-ahead log records left pending by a quiet period"""
+        with self.service.lock:
+            self.wal.sync()
+        self.root.after(self.WAL_SYNC_MS, self.sync_wal)
+    
+    def flush_history(self):
+        """Write dispatched orders left buffered by a quiet period to the history store"""
+        self.history.flush()
+        self.root.after(self.HISTORY_FLUSH_MS, self.flush_history)
+    
+    def poll_queue_changes(self):
+        """Redraw if another client of the service changed the queue"""
+        if self.displayed_version != self.queue_manager.version:
+            self.refresh.mark("queue", "buttons", "stats", "next_id")
+        self.root.after(self.POLL_MS, self.poll_queue_changes)
+    
+    def refresh_metrics(self):
+        """Keep sampling queue depth and redraw the time-based statistics"""
+        with self.service.lock:
+            self.service.metrics.tick()
+        self.refresh.mark("stats")
+        self.update_risk_flags()
+        self.root.after(self.METRICS_MS, self.refresh_metrics)
+    
+    def run_queue_change(self, change, update_rows):
+        """Apply a queue change through the service and update the display
+        
+        `change` returns the affected order (or None) and `update_rows(order)`
+        updates just its rows. If another client changed the queue since the
+        last redraw, or a rebuild is already scheduled, the whole view is
+        rebuilt on the next frame instead.
+        """
+        with self.service.lock:
+            in_sync = self.displayed_version == self.queue_manager.version
+            order = change()
+            if not in_sync or self.refresh.is_dirty("queue"):
+                self.refresh.mark("queue")
+            elif order is not None:
+                update_rows(order)
+            self.displayed_version = self.queue_manager.version
+        return order
     
     def setup_styles(self):
-        """Configure styles for the GUI"""
+        """Configure the colors, fonts and ttk theme shared by every widget"""
         style = ttk.Style()
         style.theme_use('clam')
         
@@ -93,11 +333,79 @@ class FoodPandaGUI:
         self.primary_color = "#e74c3c"  # Food Panda red
         self.secondary_color = "#2c3e50"  # Dark blue
         self.vip_color = "#f39c12"  # Gold for VIP
+        self.express_color = "#9b59b6"  # Purple for express
         self.normal_color = "#3498db"  # Blue for normal
+        self.bulk_color = "#7f8c8d"  # Grey for bulk
         self.success_color = "#2ecc71"  # Green for success
         
+        self.priority_colors = {
+            PRIORITY_VIP: self.vip_color,
+            PRIORITY_EXPRESS: self.express_color,
+            PRIORITY_NORMAL: self.normal_color,
+            PRIORITY_BULK: self.bulk_color,
+        }
+        
+        # Named fonts, resolved by Tk once and shared by every widget using them
+        self.fonts = {
+            name: tkfont.Font(self.root, family="Helvetica", size=size, weight=weight)
+            for name, size, weight in [
+                ("title", 24, "bold"),
+                ("heading", 14, "bold"),
+                ("body", 12, "normal"),
+                ("body_bold", 12, "bold"),
+                ("small", 11, "normal"),
+                ("small_bold", 11, "bold"),
+                ("status", 10, "normal"),
+            ]
+        }
+    
+    def make_label(self, parent, text, font="body", fg=None, **options):
+        """Create a label in a shared font on the window background"""
+        return tk.Label(
+            parent,
+            text=text,
+            font=self.fonts[font],
+            bg=self.bg_color,
+            fg=fg or self.secondary_color,
+            **options
+        )
+    
+    def make_button(self, parent, text, command, color, font="small", active_color=None,
+                    padx=15, pady=8, **options):
+        """Create a flat white-on-color button in a shared font"""
+        return tk.Button(
+            parent,
+            text=text,
+            command=command,
+            font=self.fonts[font],
+            bg=color,
+            fg="white",
+            activebackground=active_color or color,
+            activeforeground="white",
+            relief=tk.FLAT,
+            padx=padx,
+            pady=pady,
+            **options
+        )
+    
+    def make_section(self, parent, text, pady=15):
+        """Create a titled panel frame"""
+        return tk.LabelFrame(
+            parent,
+            text=text,
+            font=self.fonts["heading"],
+            bg=self.bg_color,
+            fg=self.secondary_color,
+            padx=20,
+            pady=pady
+        )
+    
     def create_widgets(self):
-        """Create all GUI widgets"""
+        """Create the widgets needed for the first frame
+        
+        The statistics and sample order panels are built by
+        create_deferred_panels once the first frame has been drawn.
+        """
         # Main container
         main_frame = tk.Frame(self.root, bg=self.bg_color)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
@@ -109,7 +417,7 @@ class FoodPandaGUI:
         title_label = tk.Label(
             header_frame,
             text="🍔 Food Panda Order Queue Manager",
-            font=("Helvetica", 24, "bold"),
+            font=self.fonts["title"],
             fg="white",
             bg=self.primary_color,
             pady=15
@@ -119,57 +427,44 @@ class FoodPandaGUI:
         subtitle_label = tk.Label(
             header_frame,
             text="Real-time Kitchen Order Processing System",
-            font=("Helvetica", 12),
+            font=self.fonts["body"],
             fg="white",
             bg=self.primary_color,
             pady=5
         )
         subtitle_label.pack()
         
+        # The queue and, with a history store, the history of dispatched orders
+        self.notebook = ttk.Notebook(main_frame)
+        self.notebook.pack(fill=tk.BOTH, expand=True)
+        
         # Create two main columns
-        container = tk.Frame(main_frame, bg=self.bg_color)
-        container.pack(fill=tk.BOTH, expand=True)
+        container = tk.Frame(self.notebook, bg=self.bg_color, pady=10)
+        self.notebook.add(container, text="Order Queue")
         
         # Left column - Order Input
-        left_frame = tk.Frame(container, bg=self.bg_color)
-        left_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 10))
+        self.left_frame = tk.Frame(container, bg=self.bg_color)
+        self.left_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 10))
         
         # Right column - Queue Display
         right_frame = tk.Frame(container, bg=self.bg_color)
         right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=(10, 0))
         
         # Order Input Section
-        input_frame = tk.LabelFrame(
-            left_frame,
-            text="New Order Details",
-            font=("Helvetica", 14, "bold"),
-            bg=self.bg_color,
-            fg=self.secondary_color,
-            padx=20,
-            pady=20
-        )
+        input_frame = self.make_section(self.left_frame, "New Order Details", pady=20)
         input_frame.pack(fill=tk.X, pady=(0, 20))
         
         # Order ID (auto-generated, display only)
         id_frame = tk.Frame(input_frame, bg=self.bg_color)
         id_frame.pack(fill=tk.X, pady=5)
         
-        id_label = tk.Label(
-            id_frame,
-            text="Order ID:",
-            font=("Helvetica", 12),
-            bg=self.bg_color,
-            fg=self.secondary_color,
-            width=15,
-            anchor=tk.W
-        )
+        id_label = self.make_label(id_frame, "Order ID:", width=15, anchor=tk.W)
         id_label.pack(side=tk.LEFT)
         
-        self.id_display = tk.Label(
+        self.id_display = self.make_label(
             id_frame,
-            text="1001",
-            font=("Helvetica", 12, "bold"),
-            bg=self.bg_color,
+            str(self.queue_manager.next_order_id),
+            font="body_bold",
             fg=self.primary_color
         )
         self.id_display.pack(side=tk.LEFT)
@@ -178,22 +473,14 @@ class FoodPandaGUI:
         items_frame = tk.Frame(input_frame, bg=self.bg_color)
         items_frame.pack(fill=tk.X, pady=10)
         
-        items_label = tk.Label(
-            items_frame,
-            text="Order Items:",
-            font=("Helvetica", 12),
-            bg=self.bg_color,
-            fg=self.secondary_color,
-            width=15,
-            anchor=tk.W
-        )
+        items_label = self.make_label(items_frame, "Order Items:", width=15, anchor=tk.W)
         items_label.pack(side=tk.LEFT)
         
         self.items_entry = tk.Text(
             items_frame,
             height=4,
             width=30,
-            font=("Helvetica", 11),
+            font=self.fonts["small"],
             bg="white",
             relief=tk.SOLID,
             borderwidth=1
@@ -204,147 +491,61 @@ class FoodPandaGUI:
         self.items_entry.insert("1.0", "e.g., Burger, Fries, Coke")
         self.items_entry.bind("<FocusIn>", self.clear_placeholder)
         
-        # VIP selection
-        vip_frame = tk.Frame(input_frame, bg=self.bg_color)
-        vip_frame.pack(fill=tk.X, pady=10)
+        # Priority selection
+        priority_frame = tk.Frame(input_frame, bg=self.bg_color)
+        priority_frame.pack(fill=tk.X, pady=10)
         
-        self.is_vip = tk.BooleanVar()
-        vip_check = tk.Checkbutton(
-            vip_frame,
-            text="VIP Order ⭐",
-            variable=self.is_vip,
-            font=("Helvetica", 12, "bold"),
-            bg=self.bg_color,
-            fg=self.vip_color,
-            selectcolor=self.bg_color,
-            activebackground=self.bg_color,
-            command=self.on_vip_toggle
-        )
-        vip_check.pack(side=tk.LEFT)
+        self.priority = tk.IntVar(value=PRIORITY_NORMAL)
+        for level, name in enumerate(PRIORITY_NAMES):
+            text = "VIP ⭐" if level == PRIORITY_VIP else name
+            priority_radio = tk.Radiobutton(
+                priority_frame,
+                text=text,
+                value=level,
+                variable=self.priority,
+                font=self.fonts["body_bold"],
+                bg=self.bg_color,
+                fg=self.priority_colors[level],
+                selectcolor=self.bg_color,
+                activebackground=self.bg_color,
+                command=self.on_priority_change
+            )
+            priority_radio.pack(side=tk.LEFT, padx=(0, 10))
         
         # Button frame
         button_frame = tk.Frame(input_frame, bg=self.bg_color)
         button_frame.pack(fill=tk.X, pady=(10, 0))
         
         # Add Order Button
-        self.add_button = tk.Button(
+        self.add_button = self.make_button(
             button_frame,
-            text="Add Order to Queue",
-            command=self.add_order,
-            font=("Helvetica", 12, "bold"),
-            bg=self.normal_color,
-            fg="white",
-            activebackground=self.normal_color,
-            activeforeground="white",
-            relief=tk.FLAT,
+            "Add Order to Queue",
+            self.add_order,
+            self.normal_color,
+            font="body_bold",
             padx=20,
             pady=10
         )
         self.add_button.pack(side=tk.LEFT, padx=(0, 10))
         
         # Clear Button
-        clear_button = tk.Button(
+        clear_button = self.make_button(
             button_frame,
-            text="Clear Form",
-            command=self.clear_form,
-            font=("Helvetica", 12),
-            bg="#95a5a6",
-            fg="white",
-            activebackground="#7f8c8d",
-            activeforeground="white",
-            relief=tk.FLAT,
+            "Clear Form",
+            self.clear_form,
+            "#95a5a6",
+            font="body",
+            active_color="#7f8c8d",
             padx=20,
             pady=10
         )
         clear_button.pack(side=tk.LEFT)
         
-        # Statistics Section
-        stats_frame = tk.LabelFrame(
-            left_frame,
-            text="Queue Statistics",
-            font=("Helvetica", 14, "bold"),
-            bg=self.bg_color,
-            fg=self.secondary_color,
-            padx=20,
-            pady=15
-        )
-        stats_frame.pack(fill=tk.X, pady=(0, 20))
-        
-        # Stats labels
-        self.total_orders_label = tk.Label(
-            stats_frame,
-            text="Total Orders in Queue: 0",
-            font=("Helvetica", 12),
-            bg=self.bg_color,
-            fg=self.secondary_color
-        )
-        self.total_orders_label.pack(anchor=tk.W, pady=5)
-        
-        self.vip_orders_label = tk.Label(
-            stats_frame,
-            text="VIP Orders: 0",
-            font=("Helvetica", 12),
-            bg=self.bg_color,
-            fg=self.vip_color
-        )
-        self.vip_orders_label.pack(anchor=tk.W, pady=5)
-        
-        self.normal_orders_label = tk.Label(
-            stats_frame,
-            text="Normal Orders: 0",
-            font=("Helvetica", 12),
-            bg=self.bg_color,
-            fg=self.normal_color
-        )
-        self.normal_orders_label.pack(anchor=tk.W, pady=5)
-        
-        # Quick Add Sample Orders Section
-        sample_frame = tk.LabelFrame(
-            left_frame,
-            text="Quick Add Sample Orders",
-            font=("Helvetica", 14, "bold"),
-            bg=self.bg_color,
-            fg=self.secondary_color,
-            padx=20,
-            pady=15
-        )
-        sample_frame.pack(fill=tk.X)
-        
-        sample_button_frame = tk.Frame(sample_frame, bg=self.bg_color)
-        sample_button_frame.pack(fill=tk.X)
-        
-        # Sample order buttons
-        sample_orders = [
-            ("Add Normal Order", False, self.normal_color),
-            ("Add VIP Order", True, self.vip_color)
-        ]
-        
-        for text, is_vip, color in sample_orders:
-            btn = tk.Button(
-                sample_button_frame,
-                text=text,
-                command=lambda v=is_vip: self.add_sample_order(v),
-                font=("Helvetica", 11),
-                bg=color,
-                fg="white",
-                activebackground=color,
-                activeforeground="white",
-                relief=tk.FLAT,
-                padx=15,
-                pady=8
-            )
-            btn.pack(side=tk.LEFT, padx=5, pady=5)
+        # Filled in by create_deferred_panels
+        self.stats_frame = None
         
         # Queue Display Section
-        queue_display_frame = tk.LabelFrame(
-            right_frame,
-            text="Order Queue",
-            font=("Helvetica", 14, "bold"),
-            bg=self.bg_color,
-            fg=self.secondary_color,
-            padx=20,
-            pady=20
-        )
+        queue_display_frame = self.make_section(right_frame, "Order Queue", pady=20)
         queue_display_frame.pack(fill=tk.BOTH, expand=True)
         
         # Create a treeview for the queue display
@@ -369,37 +570,43 @@ class FoodPandaGUI:
         self.queue_tree.column("priority", width=100, anchor=tk.CENTER)
         self.queue_tree.column("timestamp", width=150, anchor=tk.CENTER)
         
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(
+        # Add scrollbar. In virtual mode it tracks the whole queue rather
+        # than the rows currently in the tree.
+        self.queue_scrollbar = ttk.Scrollbar(
             queue_display_frame,
             orient=tk.VERTICAL,
-            command=self.queue_tree.yview
+            command=self.on_queue_scroll
         )
-        self.queue_tree.configure(yscrollcommand=scrollbar.set)
+        self.queue_tree.configure(yscrollcommand=self.on_tree_yscroll)
         
         # Pack tree and scrollbar
         self.queue_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.queue_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # Mouse wheel scrolling for virtual mode (Windows/macOS and X11)
+        self.queue_tree.bind("<MouseWheel>", self.on_queue_wheel)
+        self.queue_tree.bind("<Button-4>", self.on_queue_wheel)
+        self.queue_tree.bind("<Button-5>", self.on_queue_wheel)
         
-        # Configure tags for VIP and normal orders
+        # Configure tags for each priority level
         self.queue_tree.tag_configure("vip", background="#fff9e6", foreground=self.vip_color)
+        self.queue_tree.tag_configure("express", background="#f5eef8", foreground=self.express_color)
         self.queue_tree.tag_configure("normal", background="white", foreground=self.normal_color)
+        self.queue_tree.tag_configure("bulk", background="#f2f3f4", foreground=self.bulk_color)
+        # Configured last so it takes precedence over the priority colors
+        self.queue_tree.tag_configure("at_risk", background="#fadbd8")
         
         # Process Order Section
         process_frame = tk.Frame(right_frame, bg=self.bg_color)
         process_frame.pack(fill=tk.X, pady=(20, 0))
         
         # Process Next Order Button
-        self.process_button = tk.Button(
+        self.process_button = self.make_button(
             process_frame,
-            text="Process Next Order",
-            command=self.process_next_order,
-            font=("Helvetica", 14, "bold"),
-            bg=self.success_color,
-            fg="white",
-            activebackground=self.success_color,
-            activeforeground="white",
-            relief=tk.FLAT,
+            "Process Next Order",
+            self.process_next_order,
+            self.success_color,
+            font="heading",
             padx=30,
             pady=12,
             state=tk.DISABLED
@@ -407,26 +614,120 @@ class FoodPandaGUI:
         self.process_button.pack(side=tk.LEFT, padx=(0, 10))
         
         # Clear Queue Button
-        clear_queue_button = tk.Button(
+        clear_queue_button = self.make_button(
             process_frame,
-            text="Clear All Orders",
-            command=self.clear_all_orders,
-            font=("Helvetica", 12),
-            bg="#e74c3c",
-            fg="white",
-            activebackground="#c0392b",
-            activeforeground="white",
-            relief=tk.FLAT,
+            "Clear All Orders",
+            self.clear_all_orders,
+            "#e74c3c",
+            font="body",
+            active_color="#c0392b",
             padx=20,
             pady=10
         )
         clear_queue_button.pack(side=tk.LEFT)
         
+        # Batch processing and auto-dispatch
+        batch_frame = tk.Frame(right_frame, bg=self.bg_color)
+        batch_frame.pack(fill=tk.X, pady=(10, 0))
+        
+        self.batch_size = tk.IntVar(value=10)
+        batch_spinbox = tk.Spinbox(
+            batch_frame,
+            from_=1,
+            to=1000,
+            width=5,
+            textvariable=self.batch_size,
+            font=self.fonts["small"]
+        )
+        batch_spinbox.pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.batch_button = self.make_button(
+            batch_frame,
+            "Process Batch",
+            self.process_batch,
+            self.success_color,
+            state=tk.DISABLED
+        )
+        self.batch_button.pack(side=tk.LEFT, padx=(0, 20))
+        
+        self.auto_dispatch = tk.BooleanVar(value=False)
+        auto_check = tk.Checkbutton(
+            batch_frame,
+            text="Auto-dispatch",
+            variable=self.auto_dispatch,
+            command=self.on_auto_dispatch_toggle,
+            font=self.fonts["small_bold"],
+            bg=self.bg_color,
+            fg=self.secondary_color,
+            selectcolor=self.bg_color,
+            activebackground=self.bg_color
+        )
+        auto_check.pack(side=tk.LEFT, padx=(0, 5))
+        
+        # 0 dispatches only when a station signals it is free
+        self.dispatch_rate = tk.IntVar(value=30)
+        rate_spinbox = tk.Spinbox(
+            batch_frame,
+            from_=0,
+            to=6000,
+            width=5,
+            textvariable=self.dispatch_rate,
+            font=self.fonts["small"]
+        )
+        rate_spinbox.pack(side=tk.LEFT, padx=(0, 5))
+        
+        rate_label = self.make_label(batch_frame, "orders/min", font="small")
+        rate_label.pack(side=tk.LEFT, padx=(0, 20))
+        
+        # Stations outside the app signal through POST /stations/free
+        station_button = self.make_button(
+            batch_frame,
+            "Station Free",
+            self.station_free,
+            self.secondary_color,
+            pady=4
+        )
+        station_button.pack(side=tk.LEFT)
+        
+        # Actions on the order selected in the queue
+        selected_frame = tk.Frame(right_frame, bg=self.bg_color)
+        selected_frame.pack(fill=tk.X, pady=(10, 0))
+        
+        cancel_button = self.make_button(
+            selected_frame,
+            "Cancel Selected",
+            self.cancel_selected_order,
+            "#95a5a6",
+            active_color="#7f8c8d"
+        )
+        cancel_button.pack(side=tk.LEFT, padx=(0, 10))
+        
+        upgrade_button = self.make_button(
+            selected_frame,
+            "Upgrade to VIP ⭐",
+            self.upgrade_selected_order,
+            self.vip_color
+        )
+        upgrade_button.pack(side=tk.LEFT)
+        
+        # Toasts and event log, in place of modal dialogs
+        self.notifications = NotificationPanel(
+            self.root,
+            right_frame,
+            self.NOTIFICATION_MODES,
+            self.bg_color,
+            self.secondary_color,
+            self.fonts
+        )
+        
+        if self.history is not None:
+            self.create_history_tab()
+        
         # Status Bar
         self.status_bar = tk.Label(
             main_frame,
             text="Ready to accept orders",
-            font=("Helvetica", 10),
+            font=self.fonts["status"],
             bg=self.secondary_color,
             fg="white",
             anchor=tk.W,
@@ -435,12 +736,245 @@ class FoodPandaGUI:
         )
         self.status_bar.pack(fill=tk.X, pady=(20, 0))
     
-    def on_vip_toggle(self):
-        """Update button color when VIP toggle changes"""
-        if self.is_vip.get():
-            self.add_button.config(bg=self.vip_color)
-        else:
-            self.add_button.config(bg=self.normal_color)
+    def on_first_map(self, event):
+        """Build the deferred panels once the window is mapped and its first frame drawn"""
+        # Every widget's <Map> reaches the root's bindings; wait for the window's own
+        if event.widget is not self.root:
+            return
+        self.root.unbind("<Map>")
+        # Idle callbacks run in order, so the pending redraws go first; the
+        # timer then waits for the expose events of the new window too
+        self.root.after_idle(self.root.after, 0, self.create_deferred_panels)
+    
+    def create_deferred_panels(self):
+        """Build the statistics and sample order panels below the order form"""
+        # Statistics Section
+        self.stats_frame = self.make_section(self.left_frame, "Queue Statistics")
+        self.stats_frame.pack(fill=tk.X, pady=(0, 20))
+        
+        # Stats labels
+        self.total_orders_label = self.make_label(self.stats_frame, "Total Orders in Queue: 0")
+        self.total_orders_label.pack(anchor=tk.W, pady=5)
+        
+        # One count label per priority level
+        self.priority_labels = {}
+        for level, name in enumerate(PRIORITY_NAMES):
+            label = self.make_label(self.stats_frame, f"{name} Orders: 0", fg=self.priority_colors[level])
+            label.pack(anchor=tk.W, pady=2)
+            self.priority_labels[level] = label
+        
+        self.oldest_label = self.make_label(self.stats_frame, "Oldest Order Waiting: -")
+        self.oldest_label.pack(anchor=tk.W, pady=2)
+        
+        self.processed_label = self.make_label(self.stats_frame, "Orders Processed: 0", fg=self.success_color)
+        self.processed_label.pack(anchor=tk.W, pady=2)
+        
+        self.throughput_label = self.make_label(self.stats_frame, "Throughput: 0 orders/min")
+        self.throughput_label.pack(anchor=tk.W, pady=2)
+        
+        # Quick Add Sample Orders Section
+        sample_frame = self.make_section(self.left_frame, "Quick Add Sample Orders")
+        sample_frame.pack(fill=tk.X)
+        
+        sample_button_frame = tk.Frame(sample_frame, bg=self.bg_color)
+        sample_button_frame.pack(fill=tk.X)
+        
+        # Sample order buttons
+        sample_orders = [
+            ("Add Normal Order", PRIORITY_NORMAL, self.normal_color),
+            ("Add VIP Order", PRIORITY_VIP, self.vip_color),
+            ("Add Express Order", PRIORITY_EXPRESS, self.express_color),
+            ("Add Bulk Order", PRIORITY_BULK, self.bulk_color)
+        ]
+        
+        for i, (text, priority, color) in enumerate(sample_orders):
+            btn = self.make_button(
+                sample_button_frame,
+                text,
+                lambda p=priority: self.add_sample_order(p),
+                color
+            )
+            # Two buttons per row
+            btn.grid(row=i // 2, column=i % 2, padx=5, pady=5, sticky=tk.EW)
+        
+        self.update_statistics()
+    
+    def create_history_tab(self):
+        """Add the tab that pages through dispatched orders in the history store
+        
+        Its widgets are built by build_history_tab the first time it is opened.
+        """
+        self.history_tab = tk.Frame(self.notebook, bg=self.bg_color, padx=20, pady=20)
+        self.notebook.add(self.history_tab, text="Order History")
+        self.history_tree = None
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+    
+    def build_history_tab(self):
+        """Create the history tab's filters and order list"""
+        history_frame = self.history_tab
+        
+        # Filters: priority, time range and order ID
+        filter_frame = tk.Frame(history_frame, bg=self.bg_color)
+        filter_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        self.history_priority = tk.StringVar(value="All")
+        self.history_start = tk.StringVar()
+        self.history_end = tk.StringVar()
+        self.history_order_id = tk.StringVar()
+        fields = [
+            ("Priority:", ttk.Combobox(
+                filter_frame,
+                textvariable=self.history_priority,
+                values=["All", *PRIORITY_NAMES],
+                state="readonly",
+                width=9
+            )),
+            ("From:", tk.Entry(filter_frame, textvariable=self.history_start, width=16)),
+            ("To:", tk.Entry(filter_frame, textvariable=self.history_end, width=16)),
+            ("Order ID:", tk.Entry(filter_frame, textvariable=self.history_order_id, width=8)),
+        ]
+        for text, widget in fields:
+            label = self.make_label(filter_frame, text, font="small")
+            label.pack(side=tk.LEFT, padx=(0, 5))
+            widget.pack(side=tk.LEFT, padx=(0, 15))
+        
+        search_button = self.make_button(
+            filter_frame,
+            "Search",
+            self.search_history,
+            self.normal_color,
+            pady=4
+        )
+        search_button.pack(side=tk.LEFT)
+        
+        hint_label = self.make_label(
+            history_frame,
+            "Times as HH:MM (today) or YYYY-MM-DD HH:MM",
+            font="status",
+            fg="#7f8c8d"
+        )
+        hint_label.pack(anchor=tk.W)
+        
+        self.history_count_label = self.make_label(history_frame, "", font="small")
+        self.history_count_label.pack(anchor=tk.W, pady=(0, 5))
+        
+        tree_frame = tk.Frame(history_frame, bg=self.bg_color)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        
+        columns = ("order_id", "items", "priority", "timestamp", "dispatched", "wait")
+        self.history_tree = ttk.Treeview(
+            tree_frame,
+            columns=columns,
+            show="headings",
+            height=20,
+            selectmode="browse"
+        )
+        headings = {
+            "order_id": ("Order ID", 80, tk.CENTER),
+            "items": ("Items", 300, tk.W),
+            "priority": ("Priority", 90, tk.CENTER),
+            "timestamp": ("Time Added", 150, tk.CENTER),
+            "dispatched": ("Dispatched", 90, tk.CENTER),
+            "wait": ("Waited", 80, tk.CENTER),
+        }
+        for column, (text, width, anchor) in headings.items():
+            self.history_tree.heading(column, text=text)
+            self.history_tree.column(column, width=width, anchor=anchor)
+        
+        # The next page is fetched when the scrollbar reaches the bottom
+        self.history_scrollbar = ttk.Scrollbar(
+            tree_frame,
+            orient=tk.VERTICAL,
+            command=self.history_tree.yview
+        )
+        self.history_tree.configure(yscrollcommand=self.on_history_yscroll)
+        self.history_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.history_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        for level, name in enumerate(PRIORITY_NAMES):
+            self.history_tree.tag_configure(name.lower(), foreground=self.priority_colors[level])
+    
+    def on_tab_changed(self, event):
+        """Show the latest history whenever the history tab is opened"""
+        if self.notebook.select() == str(self.history_tab):
+            if self.history_tree is None:
+                self.build_history_tab()
+            self.search_history()
+    
+    def parse_history_time(self, text):
+        """Turn a history filter time into a datetime, or None if it is blank"""
+        text = text.strip()
+        if not text:
+            return None
+        for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+            try:
+                return datetime.strptime(text, fmt)
+            except ValueError:
+                pass
+        # Raises ValueError if this does not fit either
+        clock = datetime.strptime(text, "%H:%M")
+        return datetime.now().replace(hour=clock.hour, minute=clock.minute, second=0, microsecond=0)
+    
+    def search_history(self):
+        """Show the first page of history orders matching the filters"""
+        try:
+            order_id = self.history_order_id.get().strip()
+            priority = self.history_priority.get()
+            filters = {
+                "start": self.parse_history_time(self.history_start.get()),
+                "end": self.parse_history_time(self.history_end.get()),
+                "priority": PRIORITY_NAMES.index(priority) if priority in PRIORITY_NAMES else None,
+                "order_id": int(order_id) if order_id else None,
+            }
+        except ValueError:
+            self.notifications.notify(
+                "input_error", "Use HH:MM or YYYY-MM-DD HH:MM times and a numeric order ID.",
+                title="Input Error"
+            )
+            return
+        
+        self.history_filters = filters
+        self.history_last = None
+        self.history_done = False
+        self.history_tree.delete(*self.history_tree.get_children())
+        self.history_count_label.config(text=f"{self.history.count(**filters)} dispatched orders")
+        self.load_history_page()
+    
+    def load_history_page(self):
+        """Append the next page of history orders to the history tab"""
+        self.history_load_pending = False
+        if self.history_done:
+            return
+        
+        rows = self.history.query(**self.history_filters, after=self.history_last, limit=self.HISTORY_PAGE)
+        if len(rows) < self.HISTORY_PAGE:
+            self.history_done = True
+        for row_id, order_id, items, priority, created_at, dispatched_at, wait_seconds in rows:
+            name = PRIORITY_NAMES[priority]
+            values = (
+                order_id,
+                items,
+                "⭐ VIP" if priority == PRIORITY_VIP else name,
+                datetime.fromtimestamp(created_at).strftime("%Y-%m-%d %H:%M:%S"),
+                datetime.fromtimestamp(dispatched_at).strftime("%H:%M:%S"),
+                format_wait(wait_seconds),
+            )
+            self.history_tree.insert("", tk.END, iid=str(row_id), values=values, tags=(name.lower(),))
+        if rows:
+            self.history_last = rows[-1]
+    
+    def on_history_yscroll(self, first, last):
+        """Move the scrollbar, and fetch another page once the last row is in view"""
+        self.history_scrollbar.set(first, last)
+        if float(last) >= 1.0 and not self.history_done and not self.history_load_pending:
+            # Also runs after a page that does not fill the view, until it does
+            self.history_load_pending = True
+            self.root.after_idle(self.load_history_page)
+    
+    def on_priority_change(self):
+        """Update button color when the selected priority changes"""
+        color = self.priority_colors[self.priority.get()]
+        self.add_button.config(bg=color, activebackground=color)
     
     def clear_placeholder(self, event):
         """Clear the placeholder text when entry is focused"""
@@ -454,36 +988,44 @@ class FoodPandaGUI:
         
         # Validate input
         if not items or items == "e.g., Burger, Fries, Coke":
-            messagebox.showwarning("Input Error", "Please enter order items.")
+            self.notifications.notify("input_error", "Please enter order items.", title="Input Error")
             return
         
-        # Add order to queue
-        is_vip = self.is_vip.get()
-        order = self.queue_manager.add_order(items, is_vip)
+        # Add order to queue and update display
+        priority = self.priority.get()
+        order = self.run_queue_change(
+            lambda: self.service.add_order(items, priority),
+            self.place_order_row
+        )
+        is_vip = order.is_vip
         
-        # Update display
-        self.update_queue_display()
-        self.update_process_button_state()
-        self.update_statistics()
+        self.refresh.mark("buttons", "stats", "next_id")
         
         # Update status
         self.status_bar.config(
             text=f"Order #{order.order_id} added to queue. {'⭐ VIP priority!' if is_vip else ''}"
         )
         
-        # Show VIP notification
-        if is_vip and order.order_id != self.last_vip_notified:
-            messagebox.showinfo("VIP Order Added", 
-                              f"VIP Order #{order.order_id} has been added to the front of the queue!")
-            self.last_vip_notified = order.order_id
+        # Notify without blocking the next order
+        if is_vip:
+            self.notifications.notify(
+                "vip_added",
+                f"⭐ VIP Order #{order.order_id} has been added to the front of the queue!",
+                "⭐ {count} VIP orders added to the front of the queue",
+                title="VIP Order Added"
+            )
+        else:
+            self.notifications.notify(
+                "order_added",
+                f"Order #{order.order_id} added ({order.priority_name}).",
+                "{count} orders added",
+                title="Order Added"
+            )
         
         # Reset form
         self.clear_form()
-        
-        # Update next order ID display
-        self.id_display.config(text=str(self.queue_manager.next_order_id))
     
-    def add_sample_order(self, is_vip):
+    def add_sample_order(self, priority):
         """Add a sample order for testing"""
         # Sample food items
         sample_items = [
@@ -504,9 +1046,9 @@ class FoodPandaGUI:
         self.items_entry.delete("1.0", tk.END)
         self.items_entry.insert("1.0", items)
         
-        # Set VIP status
-        self.is_vip.set(is_vip)
-        self.on_vip_toggle()
+        # Set priority
+        self.priority.set(priority)
+        self.on_priority_change()
         
         # Add the order
         self.add_order()
@@ -514,93 +1056,392 @@ class FoodPandaGUI:
     def process_next_order(self):
         """Process the next order in the queue"""
         if self.queue_manager.is_empty():
-            messagebox.showinfo("Queue Empty", "No orders to process.")
+            self.notifications.notify("queue_empty", "No orders to process.", title="Queue Empty")
             return
         
-        # Get the next order
-        order = self.queue_manager.process_next_order()
-        
-        # Update display
-        self.update_queue_display()
-        self.update_process_button_state()
-        self.update_statistics()
+        # Get the next order and update display
+        order = self.run_queue_change(
+            self.service.process_next_order,
+            lambda order: self.remove_order_row(order.order_id)
+        )
+        self.refresh.mark("buttons", "stats")
+        if order is None:
+            # Another client emptied the queue first
+            self.notifications.notify("queue_empty", "No orders to process.", title="Queue Empty")
+            return
         
         # Show processing message
         vip_indicator = "⭐ VIP " if order.is_vip else ""
-        messagebox.showinfo(
-            "Order Processed", 
-            f"{vip_indicator}Order #{order.order_id} processed:\n\n{order.items}"
+        self.notifications.notify(
+            "order_processed",
+            f"{vip_indicator}Order #{order.order_id} processed: {order.items}",
+            "{count} orders processed",
+            title="Order Processed"
         )
         
         # Update status
         self.status_bar.config(
-            text=f"Order #{order.order_id} processed. {vip_indicator}Ready for next order."
+            text=f"Order #{order.order_id} processed after waiting {order.dispatch_age:.0f}s. "
+                 f"{vip_indicator}Ready for next order."
+        )
+    
+    def dispatch_orders(self, n):
+        """Process up to n orders with a single display refresh, returning them"""
+        orders = self.run_queue_change(
+            lambda: self.service.process_batch(n),
+            lambda orders: self.remove_order_rows([order.order_id for order in orders])
         )
+        self.refresh.mark("buttons", "stats")
+        if orders:
+            self.notifications.notify(
+                "order_processed",
+                f"Order #{orders[0].order_id} processed: {orders[0].items}",
+                "{count} orders processed",
+                title="Order Processed",
+                count=len(orders)
+            )
+        return orders
+    
+    def process_batch(self):
+        """Process the number of orders set in the batch size box"""
+        orders = self.dispatch_orders(max(self.spinbox_value(self.batch_size), 1))
+        if not orders:
+            self.notifications.notify("queue_empty", "No orders to process.", title="Queue Empty")
+            return
+        self.status_bar.config(text=f"{len(orders)} orders processed. Ready for next batch.")
+    
+    def spinbox_value(self, variable):
+        """Read a spinbox's IntVar, treating anything that is not a number as 0"""
+        try:
+            return max(variable.get(), 0)
+        except tk.TclError:
+            return 0
+    
+    def on_auto_dispatch_toggle(self):
+        """Start auto-dispatch afresh, without orders owed from before"""
+        self.dispatch_credit = 0.0
+        state = "on" if self.auto_dispatch.get() else "off"
+        self.notifications.notify("auto_dispatch", f"Auto-dispatch turned {state}.", title="Auto-dispatch")
+    
+    def station_free(self, count=1):
+        """Signal that a kitchen station can take `count` more orders
+        
+        With auto-dispatch on, the next tick dispatches one order per
+        signal on top of the configured rate. Stations can also signal
+        through the service's POST /stations/free endpoint.
+        """
+        held = self.service.station_free(count)
+        self.status_bar.config(text=f"Free stations waiting for orders: {held}")
+    
+    def auto_dispatch_tick(self):
+        """Dispatch the orders due since the last tick, as one batch"""
+        now = time.monotonic()
+        if self.auto_dispatch.get():
+            self.dispatch_credit += (now - self.last_auto_tick) * self.spinbox_value(self.dispatch_rate) / 60
+            signals = self.service.take_free_stations()
+            
+            due = int(self.dispatch_credit) + signals
+            if due and not self.queue_manager.is_empty():
+                served = len(self.dispatch_orders(due))
+                self.status_bar.config(text=f"Auto-dispatch: {served} orders processed.")
+            else:
+                served = 0
+            
+            # Stations stay free until an order arrives for them, but an
+            # empty queue does not let rate credit pile up
+            self.dispatch_credit -= int(self.dispatch_credit)
+            unserved = min(due - served, signals)
+            if unserved:
+                self.service.station_free(unserved)
+        self.last_auto_tick = now
+        self.root.after(self.AUTO_DISPATCH_MS, self.auto_dispatch_tick)
     
     def clear_form(self):
         """Clear the input form"""
         self.items_entry.delete("1.0", tk.END)
         self.items_entry.insert("1.0", "e.g., Burger, Fries, Coke")
-        self.is_vip.set(False)
-        self.on_vip_toggle()
+        self.priority.set(PRIORITY_NORMAL)
+        self.on_priority_change()
+    
+    def get_selected_order_id(self):
+        """Return the order ID of the selected queue row, or None"""
+        selection = self.queue_tree.selection()
+        if not selection:
+            self.notifications.notify(
+                "no_selection", "Please select an order in the queue first.", title="No Selection"
+            )
+            return None
+        # Row iids are order IDs
+        return int(selection[0])
+    
+    def cancel_selected_order(self):
+        """Cancel the order selected in the queue"""
+        order_id = self.get_selected_order_id()
+        if order_id is None:
+            return
+        
+        if not messagebox.askyesno("Confirm Cancel", f"Cancel order #{order_id}?"):
+            return
+        
+        self.run_queue_change(
+            lambda: self.service.cancel(order_id),
+            lambda order: self.remove_order_row(order.order_id)
+        )
+        self.refresh.mark("buttons", "stats")
+        self.status_bar.config(text=f"Order #{order_id} cancelled.")
+        self.notifications.notify("order_cancelled", f"Order #{order_id} cancelled.", title="Order Cancelled")
+    
+    def upgrade_selected_order(self):
+        """Upgrade the order selected in the queue to VIP priority"""
+        order_id = self.get_selected_order_id()
+        if order_id is None:
+            return
+        
+        def promote():
+            # Already VIP or gone: nothing changes, so no row may move
+            order = self.queue_manager.get(order_id)
+            if order is None or order.priority == PRIORITY_VIP:
+                return None
+            return self.service.promote(order_id, PRIORITY_VIP)
+        
+        if self.run_queue_change(promote, self.place_order_row) is None:
+            if order_id in self.queue_manager:
+                message = f"Order #{order_id} is already ⭐ VIP."
+            else:
+                message = f"Order #{order_id} is no longer in the queue."
+            self.status_bar.config(text=message)
+            self.notifications.notify("not_promoted", message, title="Order Not Upgraded")
+            return
+        
+        self.refresh.mark("stats")
+        self.status_bar.config(text=f"Order #{order_id} upgraded to ⭐ VIP priority!")
+        self.notifications.notify(
+            "order_promoted", f"Order #{order_id} upgraded to ⭐ VIP.", title="Order Upgraded"
+        )
     
     def clear_all_orders(self):
         """Clear all orders from the queue"""
         if self.queue_manager.is_empty():
-            messagebox.showinfo("Queue Empty", "Order queue is already empty.")
+            self.notifications.notify("queue_empty", "Order queue is already empty.", title="Queue Empty")
             return
         
         if messagebox.askyesno("Confirm Clear", "Are you sure you want to clear all orders from the queue?"):
-            self.queue_manager.clear_queue()
-            self.update_queue_display()
-            self.update_process_button_state()
-            self.update_statistics()
+            self.service.clear_queue()
+            self.refresh.mark("queue", "buttons", "stats")
             self.status_bar.config(text="All orders cleared from queue.")
+            self.notifications.notify("queue_cleared", "All orders cleared from queue.", title="Queue Cleared")
     
     def update_queue_display(self):
-        """Update the queue display treeview"""
-        # Clear current display
-        for item in self.queue_tree.get_children():
-            self.queue_tree.delete(item)
-        
-        # Add orders to display
-        for order in self.queue_manager.get_queue():
-            # Format timestamp
-            time_str = order.timestamp.strftime("%H:%M:%S")
+        """Rebuild the queue display treeview from scratch"""
+        with self.service.lock:
+            self.displayed_version = self.queue_manager.version
+            self.virtual_mode = len(self.queue_manager) > self.VIRTUAL_THRESHOLD
+            if self.virtual_mode:
+                self.render_window()
+                return
             
-            # Insert into tree with appropriate tag
-            tag = "vip" if order.is_vip else "normal"
-            priority = "⭐ VIP" if order.is_vip else "Normal"
+            # Clear current display
+            self.queue_tree.delete(*self.queue_tree.get_children())
             
-            self.queue_tree.insert(
-                "", tk.END,
-                values=(order.order_id, order.items, priority, time_str),
-                tags=(tag,)
-            )
+            # Add orders to display
+            for order in self.queue_manager.iter_orders():
+                self.insert_order_row(order, tk.END)
+    
+    def view_mode_changed(self):
+        """Check if the queue crossed VIRTUAL_THRESHOLD since the last rebuild"""
+        return (len(self.queue_manager) > self.VIRTUAL_THRESHOLD) != self.virtual_mode
+    
+    def window_size(self):
+        """Number of rows rendered in virtual mode"""
+        return int(self.queue_tree.cget("height")) + self.VIRTUAL_OVERSCAN
+    
+    def render_window(self):
+        """Render only the orders from view_start onwards that fit in the panel"""
+        with self.service.lock:
+            total = len(self.queue_manager)
+            size = self.window_size()
+            self.view_start = max(0, min(self.view_start, total - int(self.queue_tree.cget("height"))))
+            stop = min(self.view_start + size, total)
+            
+            selection = self.queue_tree.selection()
+            self.queue_tree.delete(*self.queue_tree.get_children())
+            for order in self.queue_manager.iter_orders(self.view_start, stop):
+                self.insert_order_row(order, tk.END)
+        
+        # Keep the selected order selected if it is still in view
+        for iid in selection:
+            if self.queue_tree.exists(iid):
+                self.queue_tree.selection_set(iid)
+        
+        # Map the scrollbar onto the logical queue
+        if total:
+            self.queue_scrollbar.set(self.view_start / total, stop / total)
+        else:
+            self.queue_scrollbar.set(0, 1)
+    
+    def on_tree_yscroll(self, first, last):
+        """Forward the tree's own scroll position unless the view is virtual"""
+        if not self.virtual_mode:
+            self.queue_scrollbar.set(first, last)
+    
+    def on_queue_scroll(self, action, amount, unit=None):
+        """Handle scrollbar drags and clicks"""
+        if not self.virtual_mode:
+            if unit is None:
+                self.queue_tree.yview(action, amount)
+            else:
+                self.queue_tree.yview(action, amount, unit)
+            return
+        
+        if action == "moveto":
+            self.view_start = int(float(amount) * len(self.queue_manager))
+        elif action == "scroll":
+            step = int(self.queue_tree.cget("height")) if unit == "pages" else 1
+            self.view_start += int(amount) * step
+        self.render_window()
+    
+    def on_queue_wheel(self, event):
+        """Scroll the virtual window with the mouse wheel"""
+        if not self.virtual_mode:
+            return None
+        
+        if event.num == 4 or event.delta > 0:
+            self.view_start -= 3
+        else:
+            self.view_start += 3
+        self.render_window()
+        return "break"
+    
+    def order_row(self, order):
+        """Return the (values, tags) shown for an order in the queue display"""
+        tags = (order.priority_name.lower(),)
+        if self.queue_manager.at_risk(order):
+            tags += ("at_risk",)
+        priority = "⭐ VIP" if order.is_vip else order.priority_name
+        return (order.order_id, order.items, priority, order.time_str), tags
+    
+    def insert_order_row(self, order, index):
+        """Insert an order's row, using its order ID as the row iid"""
+        values, tags = self.order_row(order)
+        self.queue_tree.insert("", index, iid=str(order.order_id), values=values, tags=tags)
+    
+    def place_order_row(self, order):
+        """Insert or move an order's row to the back of its priority tier"""
+        manager = self.queue_manager
+        if self.virtual_mode or self.view_mode_changed() or manager.aging is not None or manager.edf:
+            # Virtual mode only re-renders the visible window. Aged and EDF
+            # order do not follow the tiers, so positions can shift anywhere.
+            self.refresh.mark("queue")
+            return
+        
+        # The order was just queued at the back of its tier, after every
+        # order of the same or higher priority
+        index = sum(manager.level_counts[:order.priority + 1]) - 1
+        self.remove_order_row(order.order_id)
+        self.insert_order_row(order, index)
+    
+    def update_risk_flags(self):
+        """Highlight displayed orders that have come at risk of missing their deadline"""
+        with self.service.lock:
+            for iid in self.queue_tree.get_children():
+                order = self.queue_manager.get(int(iid))
+                if order is None:
+                    continue
+                tags = self.order_row(order)[1]
+                if tags != tuple(self.queue_tree.item(iid, "tags")):
+                    self.queue_tree.item(iid, tags=tags)
+    
+    def remove_order_row(self, order_id):
+        """Delete an order's row if it is displayed"""
+        self.remove_order_rows([order_id])
+    
+    def remove_order_rows(self, order_ids):
+        """Delete the displayed rows of several orders in one Treeview call"""
+        if self.virtual_mode or self.view_mode_changed():
+            # Later orders shift up into the visible window
+            self.refresh.mark("queue")
+            return
+        
+        iids = [str(order_id) for order_id in order_ids if self.queue_tree.exists(str(order_id))]
+        if iids:
+            self.queue_tree.delete(*iids)
     
     def update_process_button_state(self):
         """Enable or disable the process button based on queue state"""
-        if self.queue_manager.is_empty():
-            self.process_button.config(state=tk.DISABLED)
-        else:
-            self.process_button.config(state=tk.NORMAL)
+        state = tk.DISABLED if self.queue_manager.is_empty() else tk.NORMAL
+        self.process_button.config(state=state)
+        self.batch_button.config(state=state)
+    
+    def update_next_id(self):
+        """Show the ID the next order will get"""
+        self.id_display.config(text=str(self.queue_manager.next_order_id))
     
     def update_statistics(self):
         """Update queue statistics"""
-        queue = self.queue_manager.get_queue()
-        total = len(queue)
-        vip_count = sum(1 for order in queue if order.is_vip)
-        normal_count = total - vip_count
-        
-        self.total_orders_label.config(text=f"Total Orders in Queue: {total}")
-        self.vip_orders_label.config(text=f"VIP Orders: {vip_count}")
-        self.normal_orders_label.config(text=f"Normal Orders: {normal_count}")
+        if self.stats_frame is None:
+            # Not built yet; create_deferred_panels calls this once it is
+            return
+        stats = self.service.stats()
+        metrics = self.service.metrics_snapshot()
+        
+        self.total_orders_label.config(text=f"Total Orders in Queue: {stats['total']}")
+        for level, name in enumerate(PRIORITY_NAMES):
+            text = f"{name} Orders: {stats['by_priority'][name]}"
+            wait = metrics["wait"][name]
+            if wait["count"]:
+                # Enqueue -> dispatch wait percentiles for this tier
+                text += (f"   wait p50 {format_wait(wait['p50'])} · p95 {format_wait(wait['p95'])}"
+                         f" · p99 {format_wait(wait['p99'])}")
+            self.priority_labels[level].config(text=text)
+        
+        if stats["oldest_wait_seconds"] is None:
+            self.oldest_label.config(text="Oldest Order Waiting: -")
+        else:
+            wait = int(stats["oldest_wait_seconds"])
+            self.oldest_label.config(text=f"Oldest Order Waiting: {wait // 60}m {wait % 60:02d}s")
+        self.processed_label.config(text=f"Orders Processed: {stats['dispatched_total']}")
+        self.throughput_label.config(
+            text=f"Throughput: {metrics['throughput_per_minute']} orders/min · "
+                 f"Peak Queue Depth: {metrics['depth_peak']}"
+        )
+
+# Queue state survives restarts in this write-ahead log, next to the script
+WAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "food_panda_orders.wal")
+# Dispatched orders are kept in this SQLite database
+HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "food_panda_history.db")
 
 def main():
     """Main function to run the application"""
+    from order_service import OrderService, DEFAULT_HOST, DEFAULT_PORT
+    from order_history import OrderHistory
+    from order_wal import OrderWAL
+    
+    parser = argparse.ArgumentParser(description="Food Panda order queue manager")
+    parser.add_argument("--scheduling", choices=(SCHEDULING_PRIORITY, SCHEDULING_EDF),
+                        default=SCHEDULING_PRIORITY,
+                        help="dispatch by priority tier, or earliest deadline first")
+    args = parser.parse_args()
+    
+    # Rebuild any orders still queued when the app last stopped
+    service = OrderService(scheduling=args.scheduling)
+    wal = OrderWAL(WAL_PATH)
+    wal.recover(service.manager)
+    history = OrderHistory(HISTORY_PATH)
+    history.attach(service.manager)
+    
+    # Accept orders from integrations alongside the GUI
+    try:
+        service.start_server(DEFAULT_HOST, DEFAULT_PORT)
+    except OSError as e:
+        print(f"Order ingest endpoint not started: {e}")
+    
     root = tk.Tk()
-    app = FoodPandaGUI(root)
+    app = FoodPandaGUI(root, service, wal, history)
     root.mainloop()
+    service.stop_server()
+    with service.lock:
+        wal.close()
+        history.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
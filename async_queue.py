@@ -0,0 +1,176 @@
+"""asyncio-native order queue and a bridge into the Tk GUI
+
+AsyncOrderQueueManager keeps the OrderQueueManager priority order and adds
+awaitable producer/consumer calls for asyncio gateways:
+
+    order = await manager.put(items, priority)   # waits while the queue is full
+    order = await manager.get_next()             # waits for the next order
+    async for order in manager:                  # stream of dispatched orders
+        ...
+
+get() keeps its OrderQueueManager meaning (look up a queued order by ID), so
+the awaitable dispatch call is named get_next(). Like asyncio.Queue, the
+manager is not thread-safe: use it from its event loop's thread only.
+
+TkAsyncBridge runs an event loop in a background thread and hands results
+back to Tk through root.after polling, so neither loop blocks the other.
+"""
+import asyncio
+import collections
+import queue
+import threading
+
+from order_queue import OrderQueueManager, PRIORITY_NORMAL, SCHEDULING_PRIORITY
+
+
+class AsyncOrderQueueManager(OrderQueueManager):
+    """OrderQueueManager with awaitable put/get_next and backpressure"""
+    def __init__(self, aging=None, dispatch_log_size=1000, maxsize=0, scheduling=SCHEDULING_PRIORITY,
+                 overdue_limit=None):
+        super().__init__(aging, dispatch_log_size, scheduling=scheduling, overdue_limit=overdue_limit)
+        self.maxsize = maxsize  # 0 means unbounded
+
+        # Futures of coroutines waiting for an order / for room in the queue
+        self._getters = collections.deque()
+        self._putters = collections.deque()
+
+    def _is_full(self):
+        return self.maxsize > 0 and len(self) >= self.maxsize
+
+    def _wakeup_next(self, waiters):
+        """Wake the first waiter that is still waiting"""
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+    async def _wait(self, waiters, blocked):
+        """Wait until blocked() is false, queueing up behind earlier waiters"""
+        loop = asyncio.get_running_loop()
+        while blocked():
+            waiter = loop.create_future()
+            waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                waiter.cancel()
+                try:
+                    waiters.remove(waiter)
+                except ValueError:
+                    pass
+                # We may have been woken just before being cancelled: pass it on
+                if not blocked():
+                    self._wakeup_next(waiters)
+                raise
+
+    async def put(self, items, priority=PRIORITY_NORMAL):
+        """Queue an order, waiting while the queue is at maxsize"""
+        await self._wait(self._putters, self._is_full)
+        return self.add_order(items, priority=priority)
+
+    async def get_next(self):
+        """Dispatch the next order, waiting for one if the queue is empty"""
+        await self._wait(self._getters, self.is_empty)
+        return self.process_next_order()
+
+    async def dispatched(self):
+        """Yield orders as they are dispatched, forever"""
+        while True:
+            yield await self.get_next()
+
+    def __aiter__(self):
+        return self.dispatched()
+
+    # Synchronous changes also wake the coroutines waiting on them
+
+    def add_order(self, items, is_vip=False, priority=None, deadline=None, prep_seconds=None):
+        order = super().add_order(items, is_vip, priority, deadline, prep_seconds)
+        self._wakeup_next(self._getters)
+        return order
+
+    def restore_order(self, order, enqueued_at=None):
+        super().restore_order(order, enqueued_at)
+        self._wakeup_next(self._getters)
+
+    def process_next_order(self):
+        order = super().process_next_order()
+        if order is not None:
+            self._wakeup_next(self._putters)
+        return order
+
+    def process_batch(self, n):
+        orders = super().process_batch(n)
+        for _ in orders:
+            self._wakeup_next(self._putters)
+        return orders
+
+    def cancel(self, order_id):
+        order = super().cancel(order_id)
+        if order is not None:
+            self._wakeup_next(self._putters)
+        return order
+
+    def clear_queue(self):
+        super().clear_queue()
+        while self._putters:
+            self._wakeup_next(self._putters)
+
+
+class TkAsyncBridge:
+    """Runs an asyncio event loop beside Tk's mainloop
+
+    Coroutines are submitted to the loop thread with submit(); anything the
+    loop wants to show in the GUI goes through post(), which queues the call
+    for the Tk thread. Tk picks queued calls up every `poll_ms` with
+    root.after, so a slow GUI never stalls the loop and vice versa.
+    """
+    def __init__(self, root, poll_ms=50):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.calls = queue.SimpleQueue()
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.poll_id = self.root.after(self.poll_ms, self.poll)
+
+    def submit(self, coroutine):
+        """Schedule a coroutine on the loop; returns a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def post(self, callback, *args):
+        """Call callback(*args) on the Tk thread (safe from any thread)"""
+        self.calls.put((callback, args))
+
+    def poll(self):
+        """Run the calls posted since the last poll"""
+        while True:
+            try:
+                callback, args = self.calls.get_nowait()
+            except queue.Empty:
+                break
+            callback(*args)
+        self.poll_id = self.root.after(self.poll_ms, self.poll)
+
+    def forward_dispatched(self, manager, callback):
+        """Post callback(order) to Tk for every order the manager dispatches"""
+        async def forward():
+            async for order in manager:
+                self.post(callback, order)
+        return self.submit(forward())
+
+    def close(self):
+        """Cancel the loop's tasks, then stop the loop and polling"""
+        self.root.after_cancel(self.poll_id)
+
+        async def cancel_tasks():
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.submit(cancel_tasks()).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
@@ -0,0 +1,95 @@
+"""Stress benchmark for ConcurrentOrderQueueManager
+
+Producer threads put orders while consumer threads (kitchen stations)
+dispatch them with get_next() or drain(). Checks that every order is
+dispatched exactly once and reports throughput as the thread count grows.
+
+Run from the repository root:
+    python benchmarks/bench_concurrent.py
+"""
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from order_queue import PRIORITY_NORMAL, PRIORITY_VIP
+from concurrent_queue import ConcurrentOrderQueueManager
+
+
+def run(producers, consumers, orders_per_producer, batch, maxsize):
+    """Return (orders/sec, error) for one producer/consumer configuration"""
+    manager = ConcurrentOrderQueueManager(maxsize=maxsize)
+    total = producers * orders_per_producer
+    produced = [[] for _ in range(producers)]
+    consumed = [[] for _ in range(consumers)]
+    producers_done = threading.Event()
+    
+    def produce(index):
+        for i in range(orders_per_producer):
+            priority = PRIORITY_VIP if i % 5 == 0 else PRIORITY_NORMAL
+            produced[index].append(manager.put("Burger, Fries, Coke", priority).order_id)
+    
+    def consume(index):
+        out = consumed[index]
+        while True:
+            if batch > 1:
+                orders = manager.drain(batch, timeout=0.05)
+            else:
+                try:
+                    orders = [manager.get_next(timeout=0.05)]
+                except queue.Empty:
+                    orders = []
+            if orders:
+                out.extend(order.order_id for order in orders)
+            elif producers_done.is_set() and manager.is_empty():
+                return
+    
+    producer_threads = [threading.Thread(target=produce, args=(i,)) for i in range(producers)]
+    consumer_threads = [threading.Thread(target=consume, args=(i,)) for i in range(consumers)]
+    
+    start = time.perf_counter()
+    for thread in consumer_threads + producer_threads:
+        thread.start()
+    for thread in producer_threads:
+        thread.join()
+    producers_done.set()
+    for thread in consumer_threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    all_produced = [order_id for ids in produced for order_id in ids]
+    all_consumed = [order_id for ids in consumed for order_id in ids]
+    error = None
+    if len(all_consumed) != len(set(all_consumed)):
+        error = "duplicated orders"
+    elif sorted(all_consumed) != sorted(all_produced) or len(all_produced) != total:
+        error = "lost orders"
+    return total / elapsed, error
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=200_000,
+                        help="total orders per run")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="producer and consumer thread counts to run")
+    parser.add_argument("--batch", type=int, default=32,
+                        help="orders per drain() call (1 uses get_next)")
+    parser.add_argument("--maxsize", type=int, default=10_000,
+                        help="queue capacity that blocks producers")
+    args = parser.parse_args()
+    
+    print(f"{'producers':>9} {'consumers':>9} {'orders/sec':>12}  check")
+    for threads in args.threads:
+        rate, error = run(threads, threads, args.orders // threads, args.batch, args.maxsize)
+        print(f"{threads:>9} {threads:>9} {rate:>12.0f}  {error or 'ok'}")
+        if error:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
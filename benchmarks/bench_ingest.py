@@ -0,0 +1,65 @@
+"""Benchmark the HTTP order ingest endpoint
+
+Starts an OrderService on a free local port and posts batches of orders over
+one keep-alive connection, reporting sustained orders per second.
+
+Run from the repository root:
+    python benchmarks/bench_ingest.py
+"""
+import argparse
+import http.client
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from order_service import OrderService
+
+
+def orders_per_second(batch_size, total):
+    """Post `total` orders in batches of `batch_size` and return orders/sec"""
+    service = OrderService()
+    server = service.start_server("127.0.0.1", 0)
+    host, port = server.server_address
+    connection = http.client.HTTPConnection(host, port)
+    
+    batch = json.dumps([
+        {"items": "Burger, Fries, Coke", "priority": "VIP" if i % 5 == 0 else "Normal"}
+        for i in range(batch_size)
+    ])
+    headers = {"Content-Type": "application/json"}
+    
+    start = time.perf_counter()
+    for _ in range(total // batch_size):
+        connection.request("POST", "/orders", batch, headers)
+        response = connection.getresponse()
+        response.read()
+        if response.status != 201:
+            raise RuntimeError(f"ingest failed with HTTP {response.status}")
+    elapsed = time.perf_counter() - start
+    
+    connection.close()
+    service.stop_server()
+    assert len(service.manager) == total // batch_size * batch_size
+    return total // batch_size * batch_size / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=100_000,
+                        help="orders posted per batch size")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 1000],
+                        help="orders per request")
+    args = parser.parse_args()
+    
+    print(f"{'batch size':>10} {'orders/sec':>12}")
+    for batch_size in args.batch_sizes:
+        # Single-order requests are slow; keep that run short
+        total = min(args.orders, 5_000) if batch_size == 1 else args.orders
+        print(f"{batch_size:>10} {orders_per_second(batch_size, total):>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""Load generator and benchmark harness for the order queue
+
+Drives OrderQueueManager (or the columnar, concurrent or service front ends)
+with a synthetic workload: orders arrive by a Poisson, burst or uniform
+process with a given VIP ratio, and a kitchen dispatches at a fixed rate.
+The arrival and dispatch times only decide how operations interleave; the
+operations themselves run back to back as fast as possible.
+
+Reports ops/sec and latency percentiles per operation plus peak memory, and
+can write them as JSON and compare them with an earlier run to catch
+regressions:
+
+Run from the repository root:
+    python benchmarks/bench_load.py --orders 1000000 --output new.json
+    python benchmarks/bench_load.py --orders 1000000 --compare new.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from order_queue import OrderQueueManager, PRIORITY_NORMAL, PRIORITY_VIP
+from columnar_queue import ColumnarOrderQueueManager
+from concurrent_queue import ConcurrentOrderQueueManager
+from order_service import OrderService
+from queue_metrics import LatencyHistogram
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SAMPLE_ITEMS = [
+    "Cheeseburger, French Fries, Coke",
+    "Pepperoni Pizza, Garlic Bread, Sprite",
+    "Chicken Biryani, Raita, Salad",
+    "Vegetable Spring Rolls, Fried Rice, Tea",
+]
+
+# Ops are compared on throughput and p99; anything this much worse is a
+# regression (run-to-run noise on a quiet machine is around 5-10%)
+DEFAULT_TOLERANCE = 0.15
+# Settings that define the workload; runs are only comparable if they match
+WORKLOAD_KEYS = ("target", "orders", "queue_size", "arrival", "rate", "burst_size",
+                 "dispatch_rate", "vip_ratio", "cancel_ratio", "drain", "seed")
+
+
+def make_target(name):
+    """Return {op: callable} for a queue front end"""
+    if name == "service":
+        service = OrderService()
+        return service.manager, {
+            "add": service.add_order,
+            "process": service.process_next_order,
+            "cancel": service.cancel,
+        }
+
+    manager_class = {
+        "manager": OrderQueueManager,
+        "columnar": ColumnarOrderQueueManager,
+        "concurrent": ConcurrentOrderQueueManager,
+    }[name]
+    manager = manager_class()
+    return manager, {
+        "add": lambda items, priority: manager.add_order(items, priority=priority),
+        "process": manager.process_next_order,
+        "cancel": manager.cancel,
+    }
+
+
+def arrivals(process, rate, burst_size, rng):
+    """Yield order arrival times in seconds"""
+    now = 0.0
+    while True:
+        if process == "poisson":
+            now += rng.expovariate(rate)
+            yield now
+        elif process == "burst":
+            # Same average rate, but orders land burst_size at a time
+            now += burst_size / rate
+            for _ in range(burst_size):
+                yield now
+        else:
+            now += 1 / rate
+            yield now
+
+
+def workload(args, rng):
+    """Yield (op, args) in time order: arrivals, dispatches and cancellations"""
+    arrival_times = arrivals(args.arrival, args.rate, args.burst_size, rng)
+    interval = 1 / args.dispatch_rate if args.dispatch_rate else None
+    next_dispatch = interval
+    next_id = 1001 + args.queue_size
+
+    for i in range(args.orders):
+        arrival = next(arrival_times)
+        while interval is not None and next_dispatch <= arrival:
+            yield "process", ()
+            next_dispatch += interval
+
+        priority = PRIORITY_VIP if rng.random() < args.vip_ratio else PRIORITY_NORMAL
+        yield "add", (SAMPLE_ITEMS[i % len(SAMPLE_ITEMS)], priority)
+        next_id += 1
+        if rng.random() < args.cancel_ratio:
+            # One of the recent orders, which may already have been dispatched
+            yield "cancel", (next_id - 1 - rng.randrange(min(1000, next_id - 1001)),)
+
+    if args.drain:
+        yield "drain", ()
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None if unknown"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    """Run the workload once and return the results as a dict"""
+    rng = random.Random(args.seed)
+    manager, ops = make_target(args.target)
+
+    # Prefill outside the measurement, to benchmark a queue of this size
+    for i in range(args.queue_size):
+        ops["add"](SAMPLE_ITEMS[i % len(SAMPLE_ITEMS)], PRIORITY_NORMAL)
+
+    # Nanosecond buckets: single operations take around a microsecond
+    histograms = {op: LatencyHistogram(unit=1e-9) for op in ops}
+    clock = time.perf_counter_ns
+    start = time.perf_counter()
+    for op, op_args in workload(args, rng):
+        if op == "drain":
+            # Dispatch what is left, timed like any other dispatch
+            call, histogram = ops["process"], histograms["process"]
+            while not manager.is_empty():
+                began = clock()
+                call()
+                histogram.record((clock() - began) / 1e9)
+            continue
+        call = ops[op]
+        began = clock()
+        call(*op_args)
+        histograms[op].record((clock() - began) / 1e9)
+    elapsed = time.perf_counter() - start
+
+    results = {}
+    for op, histogram in histograms.items():
+        if not histogram.count:
+            continue
+        p50, p95, p99 = histogram.percentiles()
+        results[op] = {
+            "count": histogram.count,
+            "ops_per_sec": histogram.count / histogram.total if histogram.total else None,
+            "mean_us": histogram.mean() * 1e6,
+            "p50_us": p50 * 1e6,
+            "p95_us": p95 * 1e6,
+            "p99_us": p99 * 1e6,
+            "max_us": histogram.max * 1e6,
+        }
+    total_ops = sum(histogram.count for histogram in histograms.values())
+    return {
+        "benchmark": "bench_load",
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "ops": results,
+        "total": {"ops": total_ops, "seconds": elapsed, "ops_per_sec": total_ops / elapsed},
+        "final_depth": len(manager),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def print_results(results):
+    print(f"{results['config']['target']}: {results['config']['orders']} orders, "
+          f"{results['config']['arrival']} arrivals, prefilled {results['config']['queue_size']}")
+    print(f"{'op':<10} {'count':>10} {'ops/sec':>12} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9} {'max us':>10}")
+    for op, r in results["ops"].items():
+        print(f"{op:<10} {r['count']:>10} {r['ops_per_sec']:>12.0f} {r['p50_us']:>9.2f} "
+              f"{r['p95_us']:>9.2f} {r['p99_us']:>9.2f} {r['max_us']:>10.1f}")
+    total = results["total"]
+    print(f"total: {total['ops']} ops in {total['seconds']:.2f}s ({total['ops_per_sec']:.0f} ops/sec, "
+          f"including workload generation)")
+    if results["peak_rss_mb"] is not None:
+        print(f"peak RSS: {results['peak_rss_mb']:.1f} MB, final depth {results['final_depth']}")
+
+
+def workload_differences(results, baseline):
+    """Return (setting, baseline value, new value) for each workload setting that differs"""
+    new, old = results["config"], baseline.get("config", {})
+    return [(key, old.get(key), new.get(key)) for key in WORKLOAD_KEYS if old.get(key) != new.get(key)]
+
+
+def compare(results, baseline, tolerance):
+    """Print per-op changes against a baseline run; return the regressions found"""
+    regressions = []
+    print(f"\ncompared with {baseline.get('revision') or 'baseline'} ({baseline['started']}):")
+    for op, r in results["ops"].items():
+        old = baseline["ops"].get(op)
+        if old is None:
+            continue
+        speed = r["ops_per_sec"] / old["ops_per_sec"]
+        tail = r["p99_us"] / old["p99_us"]
+        flags = []
+        if speed < 1 - tolerance:
+            flags.append("throughput")
+        if tail > 1 + tolerance:
+            flags.append("p99")
+        print(f"{op:<10} ops/sec {speed:>6.2f}x   p99 {tail:>6.2f}x   {'REGRESSION: ' + ', '.join(flags) if flags else 'ok'}")
+        regressions += [(op, flag) for flag in flags]
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", choices=("manager", "columnar", "concurrent", "service"),
+                        default="manager", help="queue front end to drive")
+    parser.add_argument("--orders", type=int, default=200_000,
+                        help="orders arriving during the run")
+    parser.add_argument("--queue-size", type=int, default=0,
+                        help="orders queued before measuring starts")
+    parser.add_argument("--arrival", choices=("poisson", "burst", "uniform"), default="poisson",
+                        help="arrival process")
+    parser.add_argument("--rate", type=float, default=100.0,
+                        help="mean arrivals per second of simulated time")
+    parser.add_argument("--burst-size", type=int, default=50,
+                        help="orders per burst with --arrival burst")
+    parser.add_argument("--dispatch-rate", type=float, default=95.0,
+                        help="dispatches per second of simulated time (0: none until the drain)")
+    parser.add_argument("--vip-ratio", type=float, default=0.2,
+                        help="fraction of orders that are VIP")
+    parser.add_argument("--cancel-ratio", type=float, default=0.0,
+                        help="chance that an arrival is followed by a cancellation")
+    parser.add_argument("--no-drain", dest="drain", action="store_false",
+                        help="leave the remaining orders queued at the end")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="compare with an earlier --output file; exit 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="relative slowdown allowed by --compare")
+    parser.add_argument("--force", action="store_true",
+                        help="compare even if the baseline ran a different workload")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        differences = workload_differences(results, baseline)
+        if differences:
+            print("\nbaseline ran a different workload:")
+            for key, old, new in differences:
+                print(f"  {key}: {old!r} -> {new!r}")
+            if not args.force:
+                print("not comparing; rerun with the same settings or pass --force")
+                sys.exit(2)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
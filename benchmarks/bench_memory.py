@@ -0,0 +1,86 @@
+"""Measure memory per queued order with tracemalloc
+
+Compares a dict-backed Order (the original layout) with the __slots__ Order,
+both held in a plain list, and with the full OrderQueueManager (which adds a
+lane entry and an index slot per order) and ColumnarOrderQueueManager.
+
+Run from the repository root:
+    python benchmarks/bench_memory.py
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from order_queue import Order, OrderQueueManager
+from columnar_queue import ColumnarOrderQueueManager
+
+SAMPLE_ITEMS = [
+    "Cheeseburger, French Fries, Coke",
+    "Pepperoni Pizza, Garlic Bread, Sprite",
+    "Chicken Biryani, Raita, Salad",
+    "Vegetable Spring Rolls, Fried Rice, Tea",
+]
+
+
+class DictOrder:
+    """Order as it was stored before __slots__: one __dict__ per order"""
+    def __init__(self, order_id, items, is_vip=False):
+        self.order_id = order_id
+        self.items = items
+        self.is_vip = is_vip
+        self.timestamp = datetime.now()
+
+
+def fill_list(order_class, count):
+    queue = []
+    for i in range(count):
+        # Copy the string so each order owns its items, as text from the GUI would
+        items = "".join(SAMPLE_ITEMS[i % len(SAMPLE_ITEMS)])
+        queue.append(order_class(1001 + i, items, i % 5 == 0))
+    return queue
+
+
+def fill_manager(manager_class, count):
+    manager = manager_class()
+    for i in range(count):
+        items = "".join(SAMPLE_ITEMS[i % len(SAMPLE_ITEMS)])
+        manager.add_order(items, i % 5 == 0)
+    return manager
+
+
+def measure(fill, count):
+    """Return bytes still allocated per order after fill(count)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = fill(count)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return (after - before) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=100_000,
+                        help="number of orders to queue")
+    args = parser.parse_args()
+    
+    layouts = [
+        ("dict Order in a list", lambda n: fill_list(DictOrder, n)),
+        ("__slots__ Order in a list", lambda n: fill_list(Order, n)),
+        ("OrderQueueManager", lambda n: fill_manager(OrderQueueManager, n)),
+        ("ColumnarOrderQueueManager", lambda n: fill_manager(ColumnarOrderQueueManager, n)),
+    ]
+    
+    print(f"{args.orders} orders")
+    print(f"{'layout':<28} {'bytes/order':>12}")
+    for name, fill in layouts:
+        print(f"{name:<28} {measure(fill, args.orders):>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Benchmark per-operation latency of OrderQueueManager at growing queue sizes
+
+Run from the repository root:
+    python benchmarks/bench_queue_ops.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from order_queue import OrderQueueManager, linear_aging
+
+DEFAULT_SIZES = [10, 100, 1_000, 10_000, 100_000, 1_000_000]
+
+
+def prefill(manager, size, vip_every=5):
+    """Fill the queue with `size` orders, every `vip_every`-th one VIP"""
+    for i in range(size):
+        manager.add_order("Burger, Fries, Coke", i % vip_every == 0)
+
+
+def time_ops(size, ops, aging=None):
+    """Return (add_ns, process_ns) per operation at a steady queue size"""
+    manager = OrderQueueManager(aging=aging)
+    prefill(manager, size)
+    
+    add_total = 0
+    process_total = 0
+    clock = time.perf_counter_ns
+    for i in range(ops):
+        # Alternate add/process so the queue stays at `size` orders
+        is_vip = i % 5 == 0
+        start = clock()
+        manager.add_order("Burger, Fries, Coke", is_vip)
+        add_total += clock() - start
+        
+        start = clock()
+        manager.process_next_order()
+        process_total += clock() - start
+    
+    return add_total / ops, process_total / ops
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="queue sizes to measure at")
+    parser.add_argument("--ops", type=int, default=20_000,
+                        help="add/process pairs timed per size")
+    parser.add_argument("--aging", type=float, default=None, metavar="SECONDS",
+                        help="enable linear aging, one priority level per SECONDS waited")
+    args = parser.parse_args()
+    aging = linear_aging(args.aging) if args.aging else None
+    
+    print(f"{'queued':>10} {'add ns/op':>12} {'process ns/op':>14}")
+    for size in args.sizes:
+        add_ns, process_ns = time_ops(size, args.ops, aging)
+        print(f"{size:>10} {add_ns:>12.0f} {process_ns:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
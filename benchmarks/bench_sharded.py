@@ -0,0 +1,111 @@
+"""Throughput of ShardedOrderQueue as worker processes are added
+
+Orders for many branches are queued and dispatched in rounds: each round
+adds --round orders spread over the branches, then dispatches every branch's
+queue with one pipelined dispatch_many(). The same rounds are first run in
+this process against one OrderQueueManager per branch, as the baseline.
+
+The coordinator still spends about a microsecond per add, so the speedup
+levels off once the workers outpace it; it cannot exceed the number of free
+cores either.
+
+Run from the repository root:
+    python benchmarks/bench_sharded.py
+    python benchmarks/bench_sharded.py --shards 1 2 4 8 --orders 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from order_queue import OrderQueueManager, PRIORITY_NORMAL, PRIORITY_VIP
+from sharded_queue import ShardedOrderQueue
+
+SAMPLE_ITEMS = [
+    "Cheeseburger, French Fries, Coke",
+    "Pepperoni Pizza, Garlic Bread, Sprite",
+    "Chicken Biryani, Raita, Salad",
+    "Vegetable Spring Rolls, Fried Rice, Tea",
+]
+
+
+def make_rounds(args):
+    """Return rounds of (branch, items, priority) orders"""
+    rng = random.Random(args.seed)
+    branches = [f"branch-{i}" for i in range(args.branches)]
+    rounds = []
+    for start in range(0, args.orders, args.round):
+        rounds.append([
+            (rng.choice(branches), SAMPLE_ITEMS[i % len(SAMPLE_ITEMS)],
+             PRIORITY_VIP if rng.random() < 0.2 else PRIORITY_NORMAL)
+            for i in range(start, min(start + args.round, args.orders))
+        ])
+    return branches, rounds
+
+
+def run_single(branches, rounds):
+    """Seconds for the rounds with every branch queue in this process"""
+    queues = {branch: OrderQueueManager() for branch in branches}
+    dispatched = 0
+    start = time.perf_counter()
+    for orders in rounds:
+        for branch, items, priority in orders:
+            queues[branch].add_order(items, priority=priority)
+        for manager in queues.values():
+            dispatched += len(manager.process_batch(len(manager)))
+    elapsed = time.perf_counter() - start
+    assert dispatched == sum(map(len, rounds))
+    return elapsed
+
+
+def run_sharded(shards, branches, rounds):
+    """Seconds for the rounds on a ShardedOrderQueue with this many workers"""
+    with ShardedOrderQueue(shards=shards) as queues:
+        queues.stats()  # Wait for the workers to start
+        dispatched = 0
+        start = time.perf_counter()
+        for orders in rounds:
+            for branch, items, priority in orders:
+                queues.add_order(branch, items, priority)
+            for batch in queues.dispatch_many(branches, n=len(orders)).values():
+                dispatched += len(batch)
+        elapsed = time.perf_counter() - start
+    assert dispatched == sum(map(len, rounds))
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=200_000,
+                        help="orders added and dispatched")
+    parser.add_argument("--branches", type=int, default=64,
+                        help="restaurant branches the orders are spread over")
+    parser.add_argument("--round", type=int, default=10_000,
+                        help="orders added between dispatch rounds")
+    parser.add_argument("--shards", type=int, nargs="+",
+                        help="worker counts to try (default: 1, 2, 4, ... up to the CPU count)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    shard_counts = args.shards
+    if shard_counts is None:
+        shard_counts = [1]
+        while shard_counts[-1] * 2 <= os.cpu_count():
+            shard_counts.append(shard_counts[-1] * 2)
+
+    branches, rounds = make_rounds(args)
+    print(f"{args.orders} orders over {args.branches} branches, {os.cpu_count()} CPUs")
+    print(f"{'queues':<16} {'seconds':>8} {'orders/sec':>12} {'speedup':>8}")
+    baseline = run_single(branches, rounds)
+    print(f"{'single process':<16} {baseline:>8.2f} {args.orders / baseline:>12.0f} {1:>7.2f}x")
+    for shards in shard_counts:
+        elapsed = run_sharded(shards, branches, rounds)
+        print(f"{f'{shards} shards':<16} {elapsed:>8.2f} {args.orders / elapsed:>12.0f} "
+              f"{baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
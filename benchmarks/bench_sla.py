@@ -0,0 +1,145 @@
+"""Kitchen simulation: SLA misses under VIP-first and earliest-deadline-first
+
+Orders arrive at random (Poisson) with a priority mix, a prep time estimate
+and a promised delivery time of DEFAULT_SLA_SECONDS for their priority after
+ordering. A few cooks each take the next order from an OrderQueueManager
+when they are free; the actual prep time varies around the estimate. An
+order misses its SLA if it is ready after its deadline. Simulated time is
+used, so the run takes seconds whatever the load.
+
+- VIP-first: the default priority scheduling, strict tiers with FIFO in each
+- EDF: scheduling="edf", the order with the earliest deadline first; orders
+  that can no longer make it wait until no order that can is queued
+- EDF+limit: the same, but a late order waits at most --overdue-limit
+  minutes past its deadline
+
+Near full utilization VIP-first keeps VIP orders early while Bulk orders
+miss, and EDF spends the spare VIP slack on the orders about to be late.
+EDF misses fewer deadlines, but the orders it gives up on end up much later;
+the overdue limit trades some of the misses back for bounded lateness.
+"late min" is the mean lateness of the missed orders and "flagged" the share
+of them that at_risk() reported when they were dispatched.
+
+Run from the repository root:
+    python benchmarks/bench_sla.py
+    python benchmarks/bench_sla.py --cooks 4 --rates 0.4 0.45
+"""
+import argparse
+import heapq
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from order_queue import (DEFAULT_SLA_SECONDS, Order, OrderQueueManager, PRIORITY_NAMES,
+                         SCHEDULING_EDF, SCHEDULING_PRIORITY)
+
+# Share of orders at each priority level
+PRIORITY_MIX = (0.1, 0.2, 0.6, 0.1)
+# Prep time estimates are drawn from this range (seconds); the actual prep
+# time is the estimate times a random factor from PREP_VARIATION
+PREP_RANGE = (4 * 60, 12 * 60)
+PREP_VARIATION = (0.8, 1.3)
+
+
+def make_orders(count, per_minute, seed):
+    """Return (arrival_seconds, priority, prep_estimate, prep_actual) for `count` orders"""
+    rng = random.Random(seed)
+    orders = []
+    now = 0.0
+    for _ in range(count):
+        now += rng.expovariate(per_minute / 60)
+        priority = rng.choices(range(len(PRIORITY_NAMES)), PRIORITY_MIX)[0]
+        estimate = rng.uniform(*PREP_RANGE)
+        orders.append((now, priority, estimate, estimate * rng.uniform(*PREP_VARIATION)))
+    return orders
+
+
+def simulate(orders, cooks, scheduling, overdue_limit=None):
+    """Return {order_id: (priority, lateness_seconds, flagged)} for one policy"""
+    manager = OrderQueueManager(scheduling=scheduling, overdue_limit=overdue_limit)
+    actual = {}
+    flagged = {}  # order_id -> whether at_risk() flagged it when it was started
+    results = {}
+    # (time, seq, kind, payload) with kind "arrive" or "done"
+    events = [(arrival, seq, "arrive", seq) for seq, (arrival, *_) in enumerate(orders)]
+    heapq.heapify(events)
+    seq = len(events)
+    free = cooks
+
+    while events:
+        now, _, kind, payload = heapq.heappop(events)
+        now_ns = int(now * 1e9)
+        if kind == "arrive":
+            _, priority, estimate, prep = orders[payload]
+            order = Order(payload, "Order", priority=priority, created_ns=now_ns,
+                          deadline_ns=now_ns + int(DEFAULT_SLA_SECONDS[priority] * 1e9),
+                          prep_seconds=estimate)
+            manager.restore_order(order)
+            actual[payload] = prep
+        else:
+            order = payload
+            lateness = (now_ns - order.deadline_ns) / 1e9
+            results[order.order_id] = (order.priority, lateness, flagged.pop(order.order_id))
+            free += 1
+
+        # Every free cook starts the next order
+        while free and not manager.is_empty():
+            # Dispatch on the simulated clock; EDF decides what is late by it
+            order = manager._dispatch(now_ns)
+            free -= 1
+            flagged[order.order_id] = manager.at_risk(order, now_ns)
+            seq += 1
+            heapq.heappush(events, (now + actual[order.order_id], seq, "done", order))
+    return results
+
+
+def summarize(rate, cooks, name, results):
+    by_level = [[0, 0] for _ in PRIORITY_NAMES]  # [orders, missed]
+    missed = flagged = 0
+    late = 0.0
+    for priority, lateness, was_flagged in results.values():
+        by_level[priority][0] += 1
+        if lateness > 0:
+            by_level[priority][1] += 1
+            missed += 1
+            flagged += was_flagged
+            late += lateness
+    tiers = "".join(f" {100 * m / n if n else 0:>8.1f}" for n, m in by_level)
+    print(f"{rate:>6g} {name:<10} {100 * missed / len(results):>7.1f}{tiers} "
+          f"{late / missed / 60 if missed else 0:>9.1f} {100 * flagged / missed if missed else 0:>8.1f}")
+    return missed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=20_000,
+                        help="number of orders to simulate per rate")
+    parser.add_argument("--cooks", type=int, default=3,
+                        help="orders prepared at the same time")
+    parser.add_argument("--rates", type=float, nargs="+", default=[0.28, 0.31, 0.33],
+                        help="orders arriving per minute")
+    parser.add_argument("--overdue-limit", type=float, default=30,
+                        help="minutes a late order waits at most with EDF+limit")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    mean_prep = sum(PREP_RANGE) / 2 * sum(PREP_VARIATION) / 2
+    print(f"{args.orders} orders, {args.cooks} cooks, capacity {args.cooks * 60 / mean_prep:.2f}/min")
+    print(f"{'rate':>6} {'policy':<10} {'missed%':>7}"
+          + "".join(f" {name + '%':>8}" for name in PRIORITY_NAMES)
+          + f" {'late min':>9} {'flagged%':>8}")
+    for rate in args.rates:
+        orders = make_orders(args.orders, rate, args.seed)
+        vip_first = summarize(rate, args.cooks, "VIP-first",
+                              simulate(orders, args.cooks, SCHEDULING_PRIORITY))
+        edf = summarize(rate, args.cooks, "EDF", simulate(orders, args.cooks, SCHEDULING_EDF))
+        summarize(rate, args.cooks, "EDF+limit",
+                  simulate(orders, args.cooks, SCHEDULING_EDF, args.overdue_limit * 60))
+        if vip_first:
+            print(f"{'':>6} EDF misses {edf / vip_first:.2f}x as many SLAs as VIP-first")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Startup time of the GUI, from the first import to the first frame
+
+Each run starts a fresh interpreter, so imports are really loaded, and times
+these stages in it from the moment it starts running the measured code:
+
+- core: importing order_queue (checked not to pull in tkinter)
+- gui import: importing Food_Panda and tkinter
+- tk: creating the Tk root window
+- widgets: constructing FoodPandaGUI
+- first frame: processing events until the window is mapped and drawn
+- all panels: until the deferred statistics and sample panels are drawn
+
+"process" is the whole child process as seen from outside, interpreter
+startup included. The median of --runs runs is reported. The GUI stages need
+a display; without one only the import stages are measured.
+
+Run from the repository root:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 20 --output startup.json
+    python benchmarks/bench_startup.py --compare startup.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in the child; prints a JSON dict of stage -> seconds since the start
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+stages = {}
+
+def mark(stage):
+    stages[stage] = time.perf_counter() - start
+
+import order_queue
+assert "tkinter" not in sys.modules, "order_queue imported tkinter"
+mark("core")
+
+import Food_Panda
+import tkinter as tk
+mark("gui import")
+
+try:
+    root = tk.Tk()
+except tk.TclError as e:
+    stages["error"] = str(e)
+    print(json.dumps(stages))
+    sys.exit()
+mark("tk")
+
+app = Food_Panda.FoodPandaGUI(root)
+mark("widgets")
+
+# Any widget's <Expose> reaches the root's bindings, however small the window
+exposed = []
+root.bind("<Expose>", lambda event: exposed.append(True), add="+")
+while not exposed:
+    root.update()
+root.update_idletasks()
+mark("first frame")
+
+while app.stats_frame is None:
+    root.update()
+root.update_idletasks()
+mark("all panels")
+
+root.destroy()
+print(json.dumps(stages))
+"""
+
+STAGES = ["core", "gui import", "tk", "widgets", "first frame", "all panels", "process"]
+# Relative slowdown of a stage that --compare reports as a regression
+DEFAULT_TOLERANCE = 0.2
+
+
+def run_once():
+    """Return {stage: seconds} for one fresh interpreter"""
+    began = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    stages = json.loads(result.stdout.splitlines()[-1])
+    stages["process"] = time.perf_counter() - began
+    return stages
+
+
+def run(args):
+    """Run the child `args.runs` times and return the results as a dict"""
+    runs = [run_once() for _ in range(args.runs)]
+    error = runs[0].get("error")
+    medians = {}
+    for stage in STAGES:
+        values = [stages[stage] for stages in runs if stage in stages]
+        if values:
+            medians[stage] = statistics.median(values)
+    return {
+        "benchmark": "bench_startup",
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "display_error": error,
+        "median_ms": {stage: seconds * 1000 for stage, seconds in medians.items()},
+    }
+
+
+def print_results(results):
+    print(f"median of {results['config']['runs']} runs, ms since the child started")
+    for stage, ms in results["median_ms"].items():
+        print(f"{stage:<12} {ms:>9.1f}")
+    if results["display_error"]:
+        print(f"GUI stages skipped: {results['display_error']}")
+
+
+def compare(results, baseline, tolerance):
+    """Print per-stage changes against a baseline run; return the regressed stages"""
+    regressions = []
+    print(f"\ncompared with {baseline['started']}:")
+    for stage, ms in results["median_ms"].items():
+        old = baseline["median_ms"].get(stage)
+        if not old:
+            continue
+        ratio = ms / old
+        regressed = ratio > 1 + tolerance
+        print(f"{stage:<12} {ratio:>6.2f}x   {'REGRESSION' if regressed else 'ok'}")
+        if regressed:
+            regressions.append(stage)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10,
+                        help="fresh interpreters to time")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="compare with an earlier --output file; exit 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="relative slowdown allowed by --compare")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
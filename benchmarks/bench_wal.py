@@ -0,0 +1,58 @@
+"""Benchmark sustained WAL appends per second under different fsync policies
+
+Compares group commit (one fsync per batch of records) with an fsync after
+every record, by adding orders to an OrderQueueManager with an attached
+OrderWAL.
+
+Run from the repository root:
+    python benchmarks/bench_wal.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from order_queue import OrderQueueManager
+from order_wal import OrderWAL
+
+
+def appends_per_second(sync_every, records):
+    """Return the sustained add_order rate with a WAL fsyncing every `sync_every` records"""
+    with tempfile.TemporaryDirectory() as directory:
+        manager = OrderQueueManager()
+        # Only the record count triggers a sync, and no snapshots are taken
+        wal = OrderWAL(os.path.join(directory, "orders.wal"), sync_every=sync_every,
+                       sync_interval=float("inf"), snapshot_every=records + 1)
+        wal.attach(manager)
+        
+        start = time.perf_counter()
+        for i in range(records):
+            manager.add_order("Burger, Fries, Coke", i % 5 == 0)
+        wal.close()
+        elapsed = time.perf_counter() - start
+    return records / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=20_000,
+                        help="records appended per group commit run")
+    parser.add_argument("--fsync-records", type=int, default=500,
+                        help="records appended in the fsync-per-op run")
+    parser.add_argument("--group-sizes", type=int, nargs="+", default=[16, 64, 256],
+                        help="records per fsync for group commit")
+    args = parser.parse_args()
+    
+    print(f"{'policy':<24} {'appends/sec':>12}")
+    rate = appends_per_second(1, args.fsync_records)
+    print(f"{'fsync per op':<24} {rate:>12.0f}")
+    for group in args.group_sizes:
+        rate = appends_per_second(group, args.records)
+        print(f"{f'group commit ({group})':<24} {rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
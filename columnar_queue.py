@@ -0,0 +1,403 @@
+"""Columnar storage backend for OrderQueueManager
+
+Instead of one Order object per queued order, ColumnarOrderQueueManager keeps
+order fields in typed arrays (a few dozen bytes per order) and interns item
+strings against a shared menu table. Order objects are only built when an
+order leaves the manager (add, get, dispatch, get_queue).
+"""
+from array import array
+import bisect
+from datetime import datetime
+import heapq
+import itertools
+import time
+
+from order_queue import (Order, OrderQueueManager, PRIORITY_NAMES, LaneKeys, live_position,
+                         monotonic_ns_to_epoch, split_merge)
+
+
+class ColumnarLane:
+    """FIFO of order IDs in an array, popped by advancing a head index
+    
+    Like OrderLane, it keeps the sorted positions of its stale entries in
+    `dead` so live entries can be indexed without walking the lane.
+    """
+    # Drop popped IDs from the front once at least this many have built up
+    TRIM_MIN = 1024
+    
+    def __init__(self):
+        self.order_ids = array("q")
+        self.head = 0  # Index of the first unpopped order ID
+        self.offset = 0  # Absolute lane position of order_ids[0]
+        self.dead = []  # Sorted absolute positions of stale entries
+    
+    def __len__(self):
+        return len(self.order_ids) - self.head
+    
+    def live(self):
+        """Number of live entries"""
+        return len(self.order_ids) - self.head - len(self.dead)
+    
+    def append(self, order_id):
+        """Append an order ID, returning its absolute position in the lane"""
+        self.order_ids.append(order_id)
+        return self.offset + len(self.order_ids) - 1
+    
+    def kill(self, pos):
+        """Record that the entry at an absolute position is stale"""
+        bisect.insort(self.dead, pos)
+    
+    def id_at(self, index):
+        """Return the live order ID `index` places behind the head"""
+        return self.order_ids[live_position(self.dead, self.offset + self.head, index) - self.offset]
+    
+    def iter_from(self, index):
+        """Yield the live order IDs from the one `index` places behind the head"""
+        dead = self.dead
+        pos = live_position(dead, self.offset + self.head, index)
+        d = bisect.bisect_left(dead, pos)
+        for i in range(pos - self.offset, len(self.order_ids)):
+            if d < len(dead) and dead[d] == self.offset + i:
+                d += 1
+                continue
+            yield self.order_ids[i]
+    
+    def peek(self):
+        """Return (order_id, position) of the head"""
+        return self.order_ids[self.head], self.offset + self.head
+    
+    def popleft(self):
+        """Drop the head"""
+        if self.dead and self.dead[0] == self.offset + self.head:
+            del self.dead[0]
+        self.head += 1
+        if self.head >= self.TRIM_MIN and self.head * 2 >= len(self.order_ids):
+            del self.order_ids[:self.head]
+            self.offset += self.head
+            self.head = 0
+    
+    def __iter__(self):
+        """Yield (position, order_id) pairs from the head"""
+        for i in range(self.head, len(self.order_ids)):
+            yield self.offset + i, self.order_ids[i]
+    
+    def clear(self):
+        # Keep positions increasing so stale positions never match again
+        self.offset += len(self.order_ids)
+        self.order_ids = array("q")
+        self.head = 0
+        self.dead = []
+
+
+class ColumnarOrderQueueManager(OrderQueueManager):
+    """OrderQueueManager that stores queued orders in typed arrays
+    
+    Orders returned by get(), get_queue() and process_next_order() are
+    rebuilt from the arrays, so changing them does not change the queue;
+    use cancel() and promote() instead.
+    
+    Only priority scheduling is supported: no deadline or prep time is
+    stored, so no order is ever at risk.
+    """
+    # Drop dispatched rows from the front of the arrays once this many build up
+    TRIM_MIN_ROWS = 1024
+    
+    def __init__(self, aging=None, dispatch_log_size=1000):
+        super().__init__(aging, dispatch_log_size)
+        self.lanes = [ColumnarLane() for _ in PRIORITY_NAMES]
+        self.index = None  # Rows are addressed by order_id directly
+        
+        # Row r of every column holds order ID row_base + r
+        self.row_base = self.next_order_id
+        self.priorities = array("b")
+        self.created_ns = array("q")  # Creation time, monotonic ns
+        self.joined_ns = array("q")  # When the order joined its current lane, monotonic ns
+        self.item_refs = array("l")  # Index into menu_table and menu_lines
+        self.lane_pos = array("q")  # Absolute position in its lane, -1 once gone
+        
+        # Interned item strings shared by all orders, and their parsed lines
+        self.menu_table = []
+        self.menu_lines = []
+        self.menu_index = {}
+        
+        self.live = 0
+        self.dispatched_since_trim = 0
+    
+    def __len__(self):
+        return self.live
+    
+    def __contains__(self, order_id):
+        return self._row(order_id) is not None
+    
+    def add_order(self, items, is_vip=False, priority=None, deadline=None, prep_seconds=None):
+        if deadline is not None or prep_seconds is not None:
+            raise ValueError("the columnar backend does not store deadlines or prep times")
+        return super().add_order(items, is_vip, priority)
+    
+    def at_risk(self, order, now=None):
+        return False
+    
+    def at_risk_orders(self, now=None):
+        return []
+    
+    def _intern_items(self, items):
+        """Return the menu table index for an item string"""
+        ref = self.menu_index.get(items)
+        if ref is None:
+            items, lines = self.menu.parse(items)
+            ref = len(self.menu_table)
+            self.menu_table.append(items)
+            self.menu_lines.append(lines)
+            self.menu_index[items] = ref
+        return ref
+    
+    def _columns(self):
+        return (self.priorities, self.created_ns, self.joined_ns,
+                self.item_refs, self.lane_pos)
+    
+    def _ensure_row(self, order_id):
+        """Return the row for an order ID, adding empty rows to reach it"""
+        if not self.lane_pos:
+            self.row_base = order_id
+        
+        if order_id < self.row_base:
+            # Only happens when restoring orders out of ID order
+            missing = self.row_base - order_id
+            for column in self._columns():
+                column[0:0] = array(column.typecode, [-1] * missing)
+            self.row_base = order_id
+        
+        while self.row_base + len(self.lane_pos) <= order_id:
+            for column in self._columns():
+                column.append(-1)
+        return order_id - self.row_base
+    
+    def _enqueue(self, order, now):
+        ref = self._intern_items(order.items)
+        # The caller's Order shares the interned string and parsed lines too
+        order.items = self.menu_table[ref]
+        order.lines = self.menu_lines[ref]
+        if order.order_id == self.row_base + len(self.lane_pos):
+            # New orders always land here: one row appended per column
+            self.priorities.append(order.priority)
+            self.created_ns.append(order.created_ns)
+            self.joined_ns.append(now)
+            self.item_refs.append(ref)
+            self.lane_pos.append(self.lanes[order.priority].append(order.order_id))
+        else:
+            row = self._ensure_row(order.order_id)
+            self.priorities[row] = order.priority
+            self.created_ns[row] = order.created_ns
+            self.joined_ns[row] = now
+            self.item_refs[row] = ref
+            self.lane_pos[row] = self.lanes[order.priority].append(order.order_id)
+        self.live += 1
+        self.level_counts[order.priority] += 1
+    
+    def _row(self, order_id):
+        """Return the row of a queued order, or None"""
+        row = order_id - self.row_base
+        if 0 <= row < len(self.lane_pos) and self.lane_pos[row] >= 0:
+            return row
+        return None
+    
+    def _materialize(self, row):
+        """Build an Order object from a row"""
+        ref = self.item_refs[row]
+        order = Order(
+            self.row_base + row,
+            self.menu_table[ref],
+            priority=self.priorities[row],
+            created_ns=self.created_ns[row]
+        )
+        order.lines = self.menu_lines[ref]
+        return order
+    
+    def _live_rows(self, level):
+        """Yield the rows of live entries in a lane, in lane order"""
+        for pos, order_id in self.lanes[level]:
+            row = order_id - self.row_base
+            if row >= 0 and self.lane_pos[row] == pos and self.priorities[row] == level:
+                yield row
+    
+    def get(self, order_id):
+        row = self._row(order_id)
+        return self._materialize(row) if row is not None else None
+    
+    def enqueued_at(self, order_id):
+        row = self._row(order_id)
+        if row is None:
+            return None
+        return datetime.fromtimestamp(monotonic_ns_to_epoch(self.joined_ns[row]))
+    
+    def _remove(self, order_id):
+        row = self._row(order_id)
+        if row is None:
+            return None
+        
+        order = self._materialize(row)
+        self.lanes[order.priority].kill(self.lane_pos[row])
+        self.lane_pos[row] = -1
+        self.live -= 1
+        self.level_counts[order.priority] -= 1
+        self.tombstones += 1
+        return order
+    
+    def _move(self, order_id, priority, now):
+        row = self._row(order_id)
+        self.lanes[self.priorities[row]].kill(self.lane_pos[row])
+        self.tombstones += 1
+        self.level_counts[self.priorities[row]] -= 1
+        self.level_counts[priority] += 1
+        self.priorities[row] = priority
+        if self.aging is None:
+            self.joined_ns[row] = now
+            self.lane_pos[row] = self.lanes[priority].append(order_id)
+        else:
+            self._insert_by_wait(row, priority)
+        return self._materialize(row)
+    
+    def _insert_by_wait(self, row, level):
+        """Rebuild a lane with the row at its wait-ordered place, keeping its join time
+        
+        Stale entries hide the join order, so this costs O(lane); only
+        promotions with aging need it.
+        """
+        self.lane_pos[row] = -1
+        rows = list(self._live_rows(level))
+        joined = self.joined_ns
+        rows.insert(bisect.bisect_right(rows, joined[row], key=lambda r: joined[r]), row)
+        self.tombstones -= len(self.lanes[level].dead)
+        lane = ColumnarLane()
+        for r in rows:
+            self.lane_pos[r] = lane.append(self.row_base + r)
+        self.lanes[level] = lane
+    
+    def compact(self):
+        for level in range(len(self.lanes)):
+            rows = list(self._live_rows(level))
+            lane = ColumnarLane()
+            for row in rows:
+                self.lane_pos[row] = lane.append(self.row_base + row)
+            self.lanes[level] = lane
+        self.tombstones = 0
+        self._trim_rows()
+    
+    def _trim_rows(self):
+        """Drop leading rows of orders that are no longer queued"""
+        dead = 0
+        while dead < len(self.lane_pos) and self.lane_pos[dead] < 0:
+            dead += 1
+        if dead == 0:
+            return
+        for column in self._columns():
+            del column[:dead]
+        self.row_base += dead
+        self.dispatched_since_trim = 0
+    
+    def _aged_row(self, row, now):
+        wait = (now - self.joined_ns[row]) / 1e9
+        return self.priorities[row] - self.aging(wait)
+    
+    def effective_priority(self, order, now=None):
+        row = self._row(order.order_id)
+        if row is None or self.aging is None:
+            return order.priority
+        if now is None:
+            now = time.monotonic_ns()
+        return self._aged_row(row, now)
+    
+    def _head_row(self, level):
+        """Return the row of a lane's first live entry, discarding leading tombstones"""
+        lane = self.lanes[level]
+        while len(lane):
+            order_id, pos = lane.peek()
+            row = order_id - self.row_base
+            if row >= 0 and self.lane_pos[row] == pos and self.priorities[row] == level:
+                return row
+            lane.popleft()
+            self.tombstones -= 1
+        return None
+    
+    def _pop_next(self, now):
+        best_level = None
+        best_row = None
+        best_key = None
+        for level in range(len(self.lanes)):
+            row = self._head_row(level)
+            if row is None:
+                continue
+            if self.aging is None:
+                # Strict tiers: the first non-empty lane wins
+                best_level, best_row = level, row
+                break
+            key = (self._aged_row(row, now), self.joined_ns[row], row)
+            if best_key is None or key < best_key:
+                best_level, best_row, best_key = level, row, key
+        
+        if best_row is None:
+            return None
+        
+        order = self._materialize(best_row)
+        self.lanes[best_level].popleft()
+        self.lane_pos[best_row] = -1
+        self.live -= 1
+        self.level_counts[best_level] -= 1
+        
+        self.dispatched_since_trim += 1
+        if self.dispatched_since_trim >= max(self.TRIM_MIN_ROWS, len(self.lane_pos) // 2):
+            self._trim_rows()
+            self.dispatched_since_trim = 0
+        return order
+    
+    def _iter_aged(self, start, stop):
+        now = time.monotonic_ns()
+        
+        def key(row):
+            return self._aged_row(row, now), self.joined_ns[row], row
+        
+        def row_at(lane):
+            return lambda index: lane.id_at(index) - self.row_base
+        
+        views = [LaneKeys(row_at(lane), lane.live(), key) for lane in self.lanes]
+        firsts = split_merge(views, start)
+        merged = heapq.merge(
+            *((order_id - self.row_base for order_id in lane.iter_from(first))
+              for lane, first in zip(self.lanes, firsts)),
+            key=key
+        )
+        for row in itertools.islice(merged, stop - start):
+            yield self._materialize(row)
+    
+    def get_queue(self):
+        if self.aging is None:
+            return [self._materialize(row)
+                    for level in range(len(self.lanes))
+                    for row in self._live_rows(level)]
+        return list(self._iter_aged(0, len(self)))
+    
+    def _iter_range(self, start, stop):
+        offset = 0  # Queue position of the current lane's head
+        for lane in self.lanes:
+            size = lane.live()
+            first, last = max(start - offset, 0), min(stop - offset, size)
+            if first < last:
+                for order_id in itertools.islice(lane.iter_from(first), last - first):
+                    yield self._materialize(order_id - self.row_base)
+            offset += size
+            if offset >= stop:
+                break
+    
+    def is_empty(self):
+        return self.live == 0
+    
+    def _clear_storage(self):
+        for lane in self.lanes:
+            lane.clear()
+        for column in self._columns():
+            del column[:]
+        self.row_base = self.next_order_id
+        self.live = 0
+        self.level_counts = [0] * len(PRIORITY_NAMES)
+        self.tombstones = 0
+        self.dispatched_since_trim = 0
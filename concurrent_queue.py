@@ -0,0 +1,155 @@
+"""Thread-safe OrderQueueManager for several kitchen stations
+
+ConcurrentOrderQueueManager guards every queue operation with one lock and
+adds blocking producer/consumer calls on top:
+
+    put(items, priority)       Queue an order, waiting while the queue is full
+    get_next(timeout)          Wait for and dispatch the next order
+    drain(n, timeout)          Dispatch up to n orders in one lock acquisition
+
+get() keeps its OrderQueueManager meaning (look up a queued order by ID), so
+the blocking dispatch call is named get_next().
+"""
+import queue
+import threading
+import time
+
+from order_queue import OrderQueueManager, PRIORITY_NORMAL, SCHEDULING_PRIORITY
+
+
+class ConcurrentOrderQueueManager(OrderQueueManager):
+    """OrderQueueManager that many producer and consumer threads can share"""
+    def __init__(self, aging=None, dispatch_log_size=1000, maxsize=0, scheduling=SCHEDULING_PRIORITY,
+                 overdue_limit=None):
+        super().__init__(aging, dispatch_log_size, scheduling=scheduling, overdue_limit=overdue_limit)
+        self.maxsize = maxsize  # 0 means unbounded
+
+        # One lock for the whole queue; reentrant because the base class
+        # methods call each other (add_orders -> add_order, promote -> get)
+        self.lock = threading.RLock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+
+    def _wait(self, condition, ready, timeout):
+        """Wait on a condition until ready() is true; False if the timeout ran out"""
+        if timeout is None:
+            while not ready():
+                condition.wait()
+            return True
+        deadline = time.monotonic() + timeout
+        while not ready():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            condition.wait(remaining)
+        return True
+
+    def _is_full(self):
+        return self.maxsize > 0 and len(self) >= self.maxsize
+
+    def put(self, items, priority=PRIORITY_NORMAL, timeout=None):
+        """Queue an order, waiting for room if the queue is full
+
+        Raises queue.Full if no room frees up within `timeout` seconds.
+        """
+        with self.not_full:
+            if not self._wait(self.not_full, lambda: not self._is_full(), timeout):
+                raise queue.Full
+            return self.add_order(items, priority=priority)
+
+    def get_next(self, timeout=None):
+        """Dispatch the next order, waiting for one to arrive if the queue is empty
+
+        Raises queue.Empty if nothing arrives within `timeout` seconds.
+        """
+        with self.not_empty:
+            if not self._wait(self.not_empty, lambda: not self.is_empty(), timeout):
+                raise queue.Empty
+            return self.process_next_order()
+
+    def drain(self, n, timeout=0):
+        """Dispatch up to n orders under a single lock acquisition
+
+        Waits up to `timeout` seconds (None: forever) for the first order and
+        returns whatever is available then, possibly an empty list.
+        """
+        with self.not_empty:
+            self._wait(self.not_empty, lambda: not self.is_empty(), timeout)
+            return self.process_batch(n)
+
+    # Every OrderQueueManager operation runs under the lock, and wakes the
+    # threads waiting on the state it changed
+
+    def add_order(self, items, is_vip=False, priority=None, deadline=None, prep_seconds=None):
+        with self.lock:
+            order = super().add_order(items, is_vip, priority, deadline, prep_seconds)
+            self.not_empty.notify()
+            return order
+
+    def add_orders(self, orders):
+        with self.lock:
+            return super().add_orders(orders)
+
+    def restore_order(self, order, enqueued_at=None):
+        with self.lock:
+            super().restore_order(order, enqueued_at)
+            self.not_empty.notify()
+
+    def process_next_order(self):
+        with self.lock:
+            order = super().process_next_order()
+            if order is not None:
+                self.not_full.notify()
+            return order
+
+    def process_batch(self, n):
+        with self.lock:
+            orders = super().process_batch(n)
+            self.not_full.notify(len(orders))
+            return orders
+
+    def cancel(self, order_id):
+        with self.lock:
+            order = super().cancel(order_id)
+            if order is not None:
+                self.not_full.notify()
+            return order
+
+    def promote(self, order_id, priority):
+        with self.lock:
+            return super().promote(order_id, priority)
+
+    def clear_queue(self):
+        with self.lock:
+            super().clear_queue()
+            self.not_full.notify_all()
+
+    def get(self, order_id):
+        with self.lock:
+            return super().get(order_id)
+
+    def stats(self):
+        with self.lock:
+            return super().stats()
+
+    def get_queue(self):
+        with self.lock:
+            return super().get_queue()
+
+    def peek(self, n=1):
+        with self.lock:
+            return super().peek(n)
+
+    def at_risk_orders(self, now=None):
+        with self.lock:
+            return super().at_risk_orders(now)
+
+    # A generator would run outside the lock while other threads change the
+    # queue, so iteration works on a list taken under the lock, like peek()
+
+    def iter_orders(self, start=0, stop=None):
+        with self.lock:
+            return list(super().iter_orders(start, stop))
+
+    def __iter__(self):
+        return iter(self.iter_orders())
@@ -0,0 +1,219 @@
+"""Per-station sub-queues for the kitchen
+
+With one queue, the grill, fryer and drinks stations all wait on the same
+head-of-line order. StationQueueManager splits each order by item into
+parts, queues every part on the station that makes it (each station has its
+own OrderQueueManager, so priority tiers still apply per station), and joins
+the parts again: an order is complete once every station has finished its
+part.
+
+    kitchen = StationQueueManager()
+    order = kitchen.add_order("2x Burger, Fries, Coke")
+    part = kitchen.dispatch("grill")             # The grill starts its next part
+    done = kitchen.complete("grill", part.order_id)
+    # done is the order once its last part is finished, otherwise None
+"""
+from collections import deque
+
+from order_queue import MenuCatalog, Order, OrderQueueManager
+
+# Menu item -> station that prepares it; other items go to the default station
+DEFAULT_ROUTES = {
+    "Burger": "grill",
+    "Cheeseburger": "grill",
+    "Veggie Burger": "grill",
+    "Grilled Salmon": "grill",
+    "Fries": "fryer",
+    "French Fries": "fryer",
+    "Sweet Potato Fries": "fryer",
+    "Vegetable Spring Rolls": "fryer",
+    "Coke": "drinks",
+    "Sprite": "drinks",
+    "Tea": "drinks",
+    "Iced Tea": "drinks",
+    "Lemonade": "drinks",
+    "Milkshake": "drinks",
+    "Red Wine": "drinks",
+}
+DEFAULT_STATION = "kitchen"
+
+
+class KitchenStation:
+    """One station's sub-queue of order parts, and the parts it is working on"""
+    def __init__(self, name, aging, menu):
+        self.name = name
+        self.queue = OrderQueueManager(aging, menu=menu)
+        self.parents = {}  # part order_id -> parent order_id, while unfinished
+        self.in_progress = {}  # part order_id -> part, between dispatch and complete
+        self.abandoned = set()  # Part order_ids cancelled while in progress, until completed
+        self.completed_total = 0
+
+    def stats(self):
+        """The sub-queue's stats() plus the station's work in progress"""
+        stats = self.queue.stats()
+        stats["in_progress"] = len(self.in_progress)
+        stats["abandoned"] = len(self.abandoned)
+        stats["completed_total"] = self.completed_total
+        return stats
+
+
+class OrderParts:
+    """An order being prepared, and the part each station still owes it"""
+    __slots__ = ("order", "parts")
+
+    def __init__(self, order):
+        self.order = order
+        self.parts = {}  # station name -> part order_id
+
+
+class StationQueueManager:
+    """Routes orders to per-station sub-queues and joins the finished parts"""
+    def __init__(self, routes=None, default_station=DEFAULT_STATION, aging=None,
+                 menu=None, completion_log_size=1000):
+        self.menu = menu if menu is not None else MenuCatalog()
+        if routes is None:
+            routes = DEFAULT_ROUTES
+
+        # menu_item_id -> station name
+        self.routes = {self.menu.intern(item): station for item, station in routes.items()}
+        self.default_station = default_station
+        self.stations = {}
+        for name in [*routes.values(), default_station]:
+            if name not in self.stations:
+                self.stations[name] = KitchenStation(name, aging, self.menu)
+
+        self.next_order_id = 1001
+        # order_id -> OrderParts for every order not yet complete
+        self.orders = {}
+
+        self.enqueued_total = 0
+        self.completed_total = 0
+        self.cancelled_total = 0
+        # (order_id, priority, seconds from order to completion) of recent orders
+        self.completion_log = deque(maxlen=completion_log_size)
+
+    def __len__(self):
+        return len(self.orders)
+
+    def __contains__(self, order_id):
+        return order_id in self.orders
+
+    def route(self, lines):
+        """Group (menu_item_id, qty) lines by station, in order of first mention"""
+        by_station = {}
+        for item_id, qty in lines:
+            station = self.routes.get(item_id, self.default_station)
+            by_station.setdefault(station, []).append((item_id, qty))
+        return by_station
+
+    def add_order(self, items, is_vip=False, priority=None):
+        """Split an order into one part per station and queue the parts"""
+        order = Order(self.next_order_id, items, is_vip, priority)
+        self.next_order_id += 1
+        order.items, order.lines = self.menu.parse(order.items)
+
+        state = OrderParts(order)
+        by_station = self.route(order.lines)
+        if not by_station:
+            # Nothing recognizable as an item: the default station gets it all
+            by_station = {self.default_station: order.lines}
+        for name, lines in by_station.items():
+            station = self.stations[name]
+            text = self.menu.format(lines) if lines else order.items
+            part = station.queue.add_order(text, priority=order.priority)
+            station.parents[part.order_id] = order.order_id
+            state.parts[name] = part.order_id
+
+        self.orders[order.order_id] = state
+        self.enqueued_total += 1
+        return order
+
+    def get(self, order_id):
+        """Return the unfinished order with this ID, or None"""
+        state = self.orders.get(order_id)
+        return state.order if state is not None else None
+
+    def parent_of(self, station, part_id):
+        """Return the order a station's part belongs to, or None"""
+        order_id = self.stations[station].parents.get(part_id)
+        return self.get(order_id) if order_id is not None else None
+
+    def dispatch(self, station):
+        """Hand a station its next part to prepare, or None if it has none queued"""
+        station = self.stations[station]
+        part = station.queue.process_next_order()
+        if part is not None:
+            station.in_progress[part.order_id] = part
+        return part
+
+    def complete(self, station, part_id):
+        """Mark a dispatched part finished
+
+        Returns the parent order once all of its parts are finished, with
+        dispatch_age set to the seconds from order to completion; otherwise
+        None. Completing a part whose order was cancelled while it was being
+        prepared does nothing and returns None.
+        """
+        station = self.stations[station]
+        if part_id in station.abandoned:
+            station.abandoned.discard(part_id)
+            return None
+        if station.in_progress.pop(part_id, None) is None:
+            raise KeyError(f"part {part_id} is not in progress at {station.name}")
+        station.completed_total += 1
+
+        state = self.orders[station.parents.pop(part_id)]
+        del state.parts[station.name]
+        if state.parts:
+            return None
+
+        order = state.order
+        del self.orders[order.order_id]
+        order.dispatch_age = order.wait_seconds()
+        self.completion_log.append((order.order_id, order.priority, order.dispatch_age))
+        self.completed_total += 1
+        return order
+
+    def cancel(self, order_id):
+        """Drop an unfinished order and all of its parts, returning it (or None)"""
+        state = self.orders.pop(order_id, None)
+        if state is None:
+            return None
+
+        for name, part_id in state.parts.items():
+            station = self.stations[name]
+            station.parents.pop(part_id, None)
+            # A part already being prepared is abandoned; the station may
+            # still report it complete
+            if station.in_progress.pop(part_id, None) is None:
+                station.queue.cancel(part_id)
+            else:
+                station.abandoned.add(part_id)
+        self.cancelled_total += 1
+        return state.order
+
+    def promote(self, order_id, priority):
+        """Move an order's still-queued parts to another priority level"""
+        state = self.orders.get(order_id)
+        if state is None:
+            return None
+
+        state.order.priority = priority
+        for name, part_id in state.parts.items():
+            self.stations[name].queue.promote(part_id, priority)
+        return state.order
+
+    def station_stats(self, station):
+        return self.stations[station].stats()
+
+    def stats(self):
+        """Return kitchen-wide counters and every station's stats"""
+        waits = [age for _, _, age in self.completion_log]
+        return {
+            "total": len(self),
+            "enqueued_total": self.enqueued_total,
+            "completed_total": self.completed_total,
+            "cancelled_total": self.cancelled_total,
+            "avg_completion_seconds": sum(waits) / len(waits) if waits else None,
+            "stations": {name: station.stats() for name, station in self.stations.items()},
+        }
@@ -0,0 +1,161 @@
+"""SQLite history of dispatched orders
+
+A dispatched order leaves the queue for good; OrderHistory listens to the
+manager and appends every dispatched order to a SQLite database, so past
+orders can still be looked up and reported on:
+
+    history = OrderHistory("history.db")
+    history.attach(manager)
+    rows = history.query(start=datetime(2024, 5, 1, 12), end=datetime(2024, 5, 1, 13),
+                         priority=PRIORITY_VIP)
+    more = history.query(..., after=rows[-1])    # The next page
+
+The database runs in WAL mode and rows are inserted in batches, one
+transaction per batch, so recording costs the queue little. Queries page
+with a cursor (the last row of the previous page) on indexed columns rather
+than OFFSET, so every page costs the same however deep it is.
+"""
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY,
+    order_id INTEGER NOT NULL,
+    items TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    dispatched_at REAL NOT NULL,
+    wait_seconds REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_order_id ON orders (order_id);
+CREATE INDEX IF NOT EXISTS orders_created_at ON orders (created_at);
+CREATE INDEX IF NOT EXISTS orders_priority_created_at ON orders (priority, created_at);
+"""
+
+COLUMNS = "id, order_id, items, priority, created_at, dispatched_at, wait_seconds"
+
+
+def _epoch(value):
+    """Epoch seconds from a datetime or a number"""
+    return value.timestamp() if isinstance(value, datetime) else value
+
+
+class OrderHistory:
+    """Append-only store of dispatched orders with indexed range queries
+
+    Rows are (id, order_id, items, priority, created_at, dispatched_at,
+    wait_seconds) tuples, with times in epoch seconds; `id` is the row's
+    position in the store, since order IDs may repeat if the queue's write-
+    ahead log is ever reset.
+    """
+    def __init__(self, path, batch_size=256, flush_interval=0.5):
+        # Buffered rows are inserted once `batch_size` are pending, or on the
+        # first dispatch after `flush_interval` seconds
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only syncs at checkpoints; a crash can lose the
+        # last transactions but never corrupts the database
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        # The listener runs on whichever thread dispatched the order
+        self.lock = threading.Lock()
+
+        self.manager = None
+        self.pending = []
+        self.last_flush = time.monotonic()
+
+    def attach(self, manager):
+        """Record every order the manager dispatches from now on"""
+        self.manager = manager
+        manager.listeners.append(self.on_queue_event)
+
+    def on_queue_event(self, event, order):
+        """OrderQueueManager listener"""
+        if event != "process":
+            return
+        now = time.time()
+        with self.lock:
+            self.pending.append((order.order_id, order.items, order.priority,
+                                 order.created_at, now, order.dispatch_age))
+            if (len(self.pending) >= self.batch_size
+                    or time.monotonic() - self.last_flush >= self.flush_interval):
+                self._flush()
+
+    def flush(self):
+        """Insert every buffered row"""
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        if self.pending:
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT INTO orders (order_id, items, priority, created_at, dispatched_at, "
+                    "wait_seconds) VALUES (?, ?, ?, ?, ?, ?)",
+                    self.pending
+                )
+            self.pending = []
+        self.last_flush = time.monotonic()
+
+    def _where(self, start, end, priority, order_id):
+        """WHERE clause and parameters for the query filters"""
+        clauses = []
+        params = []
+        if order_id is not None:
+            clauses.append("order_id = ?")
+            params.append(order_id)
+        if priority is not None:
+            clauses.append("priority = ?")
+            params.append(priority)
+        if start is not None:
+            clauses.append("created_at >= ?")
+            params.append(_epoch(start))
+        if end is not None:
+            clauses.append("created_at < ?")
+            params.append(_epoch(end))
+        return clauses, params
+
+    def query(self, start=None, end=None, priority=None, order_id=None, after=None, limit=100):
+        """Return up to `limit` orders created in [start, end), newest first
+
+        `start` and `end` are datetimes or epoch seconds; `priority` and
+        `order_id` narrow the results further. Pass the last row of a page
+        as `after` to get the page that follows it.
+        """
+        clauses, params = self._where(start, end, priority, order_id)
+        if after is not None:
+            clauses.append("(created_at, id) < (?, ?)")
+            params += [after[4], after[0]]
+        sql = f"SELECT {COLUMNS} FROM orders"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+
+        with self.lock:
+            self._flush()
+            return self.connection.execute(sql, params).fetchall()
+
+    def count(self, start=None, end=None, priority=None, order_id=None):
+        """Number of orders matching the same filters as query()"""
+        clauses, params = self._where(start, end, priority, order_id)
+        sql = "SELECT COUNT(*) FROM orders"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        with self.lock:
+            self._flush()
+            return self.connection.execute(sql, params).fetchone()[0]
+
+    def close(self):
+        """Insert the buffered rows, stop recording and close the database"""
+        if self.manager is not None and self.on_queue_event in self.manager.listeners:
+            self.manager.listeners.remove(self.on_queue_event)
+        with self.lock:
+            self._flush()
+            self.connection.close()
@@ -0,0 +1,990 @@
+"""Order queue core: orders, the menu catalog and OrderQueueManager
+
+Nothing here imports tkinter, so the HTTP service, the write-ahead log, the
+benchmarks and other headless code can use the queue without a display.
+Food_Panda re-exports these names for the GUI and for existing imports.
+"""
+from collections import Counter, deque
+from datetime import datetime
+import bisect
+import functools
+import heapq
+import itertools
+import re
+import time
+
+# Priority levels, most urgent first. Lower numbers are served first.
+PRIORITY_VIP = 0
+PRIORITY_EXPRESS = 1
+PRIORITY_NORMAL = 2
+PRIORITY_BULK = 3
+PRIORITY_NAMES = ("VIP", "Express", "Normal", "Bulk")
+
+# Delivery promised for an order without its own deadline: seconds after
+# ordering, by priority level
+DEFAULT_SLA_SECONDS = (15 * 60, 25 * 60, 40 * 60, 90 * 60)
+_DEFAULT_SLA_NS = tuple(int(seconds * 1e9) for seconds in DEFAULT_SLA_SECONDS)
+# Prep time assumed for an order without its own estimate
+DEFAULT_PREP_SECONDS = 8 * 60
+
+# OrderQueueManager scheduling modes
+SCHEDULING_PRIORITY = "priority"  # Priority tiers, FIFO within a tier (optionally aged)
+SCHEDULING_EDF = "edf"  # Earliest deadline first, across all tiers
+
+class LinearAging:
+    """Aging curve that raises an order one priority level per `interval` seconds waited
+    
+    A class rather than a closure so it can be pickled into worker processes.
+    """
+    __slots__ = ("interval", "max_boost")
+    
+    def __init__(self, interval, max_boost=None):
+        self.interval = interval
+        self.max_boost = max_boost
+    
+    def __call__(self, wait_seconds):
+        boost = wait_seconds / self.interval
+        if self.max_boost is not None:
+            boost = min(boost, self.max_boost)
+        return boost
+    
+    def __repr__(self):
+        return f"linear_aging({self.interval!r}, max_boost={self.max_boost!r})"
+
+def linear_aging(interval, max_boost=None):
+    """Aging curve that raises an order one priority level per `interval` seconds waited"""
+    return LinearAging(interval, max_boost)
+
+# Quantity written before ("2x Burger", "2 x Burger") or after ("Burger x2") an
+# item. The "x" is required: a bare leading number is part of the name ("7 Up").
+QTY_PREFIX = re.compile(r"^([1-9]\d*)\s*[x×]\s+(\S.*)$", re.IGNORECASE)
+QTY_SUFFIX = re.compile(r"^(\S.*?)\s+[x×]\s*([1-9]\d*)$", re.IGNORECASE)
+
+def split_quantity(text):
+    """Split one item of an order into (name, qty)"""
+    match = QTY_PREFIX.match(text)
+    if match:
+        return match.group(2), int(match.group(1))
+    match = QTY_SUFFIX.match(text)
+    if match:
+        return match.group(1), int(match.group(2))
+    return text, 1
+
+class MenuCatalog:
+    """Interned menu items, and parsing of free-text items against them
+    
+    Each distinct item name (ignoring case and spacing) is stored once and
+    gets a small integer menu_item_id. parse() turns an items string such
+    as "2x Burger, Fries, Coke" into (menu_item_id, qty) lines and caches
+    the result, so a repeated items string is neither re-parsed nor stored
+    again. Items are free text, so at most `max_items` names are stored;
+    past that a new name's text stands in for its menu_item_id.
+    """
+    def __init__(self, names=(), cache_size=4096, max_items=10000):
+        self.names = []  # menu_item_id -> display name (first spelling seen)
+        self.ids = {}  # normalized name -> menu_item_id
+        self.max_items = max_items
+        for name in names:
+            self.intern(name)
+        self.parse = functools.lru_cache(maxsize=cache_size)(self._parse)
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def intern(self, name):
+        """Return the menu_item_id for an item name, adding it if new
+        
+        A new name is not added once the catalog is full; its normalized
+        text is returned instead, which name() and format() also accept.
+        """
+        name = " ".join(name.split())
+        key = name.casefold()
+        item_id = self.ids.get(key)
+        if item_id is None:
+            if len(self.names) >= self.max_items:
+                return name
+            item_id = len(self.names)
+            self.names.append(name)
+            self.ids[key] = item_id
+        return item_id
+    
+    def name(self, item_id):
+        if isinstance(item_id, str):
+            return item_id
+        return self.names[item_id]
+    
+    def _parse(self, items):
+        """Return (items, lines) for an items string
+        
+        `lines` is a tuple of (menu_item_id, qty) in order of first mention,
+        with repeats of an item summed. `items` is the cached copy of the
+        string, which callers keep instead of their own so identical orders
+        share one string.
+        """
+        lines = {}
+        for part in items.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            name, qty = split_quantity(part)
+            item_id = self.intern(name)
+            lines[item_id] = lines.get(item_id, 0) + qty
+        return items, tuple(lines.items())
+    
+    def format(self, lines):
+        """Turn (menu_item_id, qty) lines back into display text"""
+        return ", ".join(
+            self.name(item_id) if qty == 1 else f"{qty}x {self.name(item_id)}"
+            for item_id, qty in lines
+        )
+    
+    def totals(self, orders):
+        """Return a Counter of item name -> total quantity over some orders"""
+        totals = Counter()
+        for order in orders:
+            for item_id, qty in order.lines:
+                totals[self.name(item_id)] += qty
+        return totals
+
+# Wall-clock time at monotonic zero, read once so that mapping a time to the
+# other clock and back gives the same time. A wall-clock change after startup
+# shifts the epoch times shown and persisted, never the waits.
+_EPOCH_OFFSET = time.time() - time.monotonic()
+
+def epoch_to_monotonic_ns(epoch):
+    """Map a wall-clock time (epoch seconds) onto this process's monotonic clock"""
+    return int((epoch - _EPOCH_OFFSET) * 1e9)
+
+def monotonic_ns_to_epoch(ns):
+    """Map a time.monotonic_ns() reading back to wall-clock epoch seconds"""
+    return _EPOCH_OFFSET + ns / 1e9
+
+class Order:
+    """Order class to represent each order"""
+    # No per-instance __dict__: large queues hold millions of these
+    __slots__ = ("order_id", "items", "lines", "priority", "created_ns",
+                 "deadline_ns", "prep_seconds", "dispatch_age", "_time_str")
+    
+    def __init__(self, order_id, items, is_vip=False, priority=None, created_at=None, created_ns=None,
+                 deadline_ns=None, prep_seconds=None):
+        self.order_id = order_id
+        self.items = items
+        self.lines = None  # (menu_item_id, qty) tuples, set when the order is queued
+        if priority is None:
+            priority = PRIORITY_VIP if is_vip else PRIORITY_NORMAL
+        self.priority = priority
+        
+        # Waits are measured on the monotonic clock, so they stay right when
+        # the wall clock is changed; the epoch time is derived from it, only
+        # for display and for persisting. Orders created earlier (e.g.
+        # recovered from disk) pass their epoch time instead.
+        if created_ns is None:
+            created_ns = time.monotonic_ns() if created_at is None else epoch_to_monotonic_ns(created_at)
+        self.created_ns = created_ns
+        
+        # Promised delivery (monotonic ns) and estimated prep time, if the
+        # order has its own; otherwise both are derived when needed (see
+        # due_ns and prep_estimate), which saves storing them per order
+        self.deadline_ns = deadline_ns
+        self.prep_seconds = prep_seconds
+        self.dispatch_age = None  # Seconds waited, set when the order is dispatched
+        self._time_str = None
+    
+    @property
+    def created_at(self):
+        """Creation time in epoch seconds"""
+        return monotonic_ns_to_epoch(self.created_ns)
+    
+    @property
+    def timestamp(self):
+        """Creation time as a datetime"""
+        return datetime.fromtimestamp(self.created_at)
+    
+    @property
+    def time_str(self):
+        """Creation time as HH:MM:SS, formatted on first use and then cached"""
+        if self._time_str is None:
+            self._time_str = time.strftime("%H:%M:%S", time.localtime(self.created_at))
+        return self._time_str
+    
+    def wait_seconds(self, now=None):
+        """Seconds since the order was created, on the monotonic clock"""
+        if now is None:
+            now = time.monotonic_ns()
+        return (now - self.created_ns) / 1e9
+    
+    @property
+    def due_ns(self):
+        """Promised delivery on the monotonic clock
+        
+        Without its own deadline an order is due DEFAULT_SLA_SECONDS for its
+        priority after it was placed.
+        """
+        if self.deadline_ns is not None:
+            return self.deadline_ns
+        return self.created_ns + _DEFAULT_SLA_NS[self.priority]
+    
+    @property
+    def prep_estimate(self):
+        """Estimated prep time in seconds, DEFAULT_PREP_SECONDS unless the order has its own"""
+        return DEFAULT_PREP_SECONDS if self.prep_seconds is None else self.prep_seconds
+    
+    @property
+    def deadline(self):
+        """Promised delivery time in epoch seconds"""
+        return monotonic_ns_to_epoch(self.due_ns)
+    
+    def slack_seconds(self, now=None):
+        """Seconds to spare if prep started now: negative means the deadline is missed"""
+        if now is None:
+            now = time.monotonic_ns()
+        return (self.due_ns - now) / 1e9 - self.prep_estimate
+    
+    @property
+    def is_vip(self):
+        return self.priority == PRIORITY_VIP
+    
+    @property
+    def priority_name(self):
+        return PRIORITY_NAMES[self.priority]
+    
+    def __str__(self):
+        if self.is_vip:
+            indicator = " ⭐"
+        elif self.priority != PRIORITY_NORMAL:
+            indicator = f" ({self.priority_name})"
+        else:
+            indicator = ""
+        return f"Order #{self.order_id}{indicator}: {self.items}"
+
+class QueueEntry:
+    """Slot an order occupies in a priority lane"""
+    __slots__ = ("order", "seq", "joined_ns", "cancelled")
+    
+    def __init__(self, order, seq, joined_ns):
+        self.order = order
+        self.seq = seq  # Position in lane order, used to break ties
+        self.joined_ns = joined_ns  # When the order joined its current lane (monotonic ns)
+        self.cancelled = False  # Tombstone: skipped on dispatch, dropped on compaction
+
+def live_position(dead, head, index, lo=0):
+    """Lane position of the live entry `index` places behind the head
+    
+    `dead` is the sorted lane positions of tombstones; those from dead[lo]
+    on are at or behind position `head`. dead[j] - j never decreases, so
+    the number of tombstones in front of the entry is found by bisection.
+    """
+    target = head + index
+    first, hi = lo, len(dead)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if dead[mid] - (mid - first) <= target:
+            lo = mid + 1
+        else:
+            hi = mid
+    return target + lo - first
+
+class LaneKeys:
+    """The sort keys of a lane's live entries, as a sequence bisect can search
+    
+    `get(index)` returns the live entry `index` places behind the head.
+    """
+    __slots__ = ("get", "size", "key")
+    
+    def __init__(self, get, size, key):
+        self.get = get
+        self.size = size
+        self.key = key
+    
+    def __len__(self):
+        return self.size
+    
+    def __getitem__(self, index):
+        return self.key(self.get(index))
+
+def split_merge(views, k):
+    """Return how many items of each sorted view come before position k of their merge
+    
+    Keys must be distinct across the views. The item at position k is found
+    by bisecting each view in turn, counting the items of the others before
+    it by bisection too: O(views² log² n) key lookups.
+    """
+    for view in views:
+        lo, hi = 0, len(view)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = view[mid]
+            before = mid + sum(bisect.bisect_left(other, value) for other in views if other is not view)
+            if before < k:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(view):
+            value = view[lo]
+            firsts = [bisect.bisect_left(other, value) for other in views]
+            if sum(firsts) == k:
+                return firsts
+    # k is at or past the end of the merge
+    return [len(view) for view in views]
+
+def _lane_key(entry):
+    """Lanes are kept in this order: by the time each entry joined, then by seq"""
+    return entry.joined_ns, entry.seq
+
+def _deadline_key(entry):
+    """EDF lanes are kept in this order: by deadline, then by seq"""
+    return entry.order.due_ns, entry.seq
+
+def _latest_start_ns(order):
+    """Last moment the order can be started and still make its deadline"""
+    return order.due_ns - int(order.prep_estimate * 1e9)
+
+class OrderLane:
+    """FIFO of queue entries with O(1) append and popleft
+    
+    Cancelled entries stay in place as tombstones until they reach the head
+    or the lane is compacted. `dead` keeps their lane positions (counted
+    from the lane's creation, so trimming does not change them), which
+    lets live entries be indexed in O(log tombstones). Entries are kept
+    sorted by `key`.
+    """
+    # Drop popped slots from the front once at least this many have built up
+    TRIM_MIN = 1024
+    
+    def __init__(self, entries=(), key=_lane_key):
+        self.key = key
+        self.entries = list(entries)
+        self.head = 0  # Index of the first unpopped entry
+        self.offset = 0  # Lane position of entries[0]
+        self.dead = []  # Sorted lane positions of tombstones
+        self.dead_head = 0  # Index in `dead` of the first tombstone not yet popped
+    
+    def __len__(self):
+        """Number of slots from the head, tombstones included"""
+        return len(self.entries) - self.head
+    
+    def live(self):
+        """Number of live entries"""
+        return len(self.entries) - self.head - (len(self.dead) - self.dead_head)
+    
+    def kill(self, entry):
+        """Record that a queued entry has become a tombstone
+        
+        Returns False, changing nothing, if the entry is not in this lane.
+        """
+        key = self.key
+        slot = bisect.bisect_left(self.entries, key(entry), lo=self.head, key=key)
+        if slot == len(self.entries) or self.entries[slot] is not entry:
+            return False
+        bisect.insort(self.dead, self.offset + slot, lo=self.dead_head)
+        return True
+    
+    def count_before(self, key):
+        """Number of live entries that sort before `key`"""
+        slot = bisect.bisect_left(self.entries, key, lo=self.head, key=self.key)
+        dead = bisect.bisect_left(self.dead, self.offset + slot, lo=self.dead_head) - self.dead_head
+        return slot - self.head - dead
+    
+    def insert(self, entry):
+        """Add an entry at its place in lane order, usually the back"""
+        entries = self.entries
+        key = self.key
+        if self.head == len(entries) or key(entries[-1]) <= key(entry):
+            entries.append(entry)
+            return
+        slot = bisect.bisect_right(entries, key(entry), lo=self.head, key=key)
+        entries.insert(slot, entry)
+        # Tombstones behind it move back one position
+        dead = self.dead
+        for i in range(bisect.bisect_left(dead, self.offset + slot, lo=self.dead_head), len(dead)):
+            dead[i] += 1
+    
+    def entry_at(self, index):
+        """Return the live entry `index` places behind the head"""
+        return self.entries[live_position(self.dead, self.offset + self.head, index, self.dead_head) - self.offset]
+    
+    def iter_from(self, index):
+        """Yield the live entries from the one `index` places behind the head"""
+        entries = self.entries
+        start = live_position(self.dead, self.offset + self.head, index, self.dead_head) - self.offset
+        for i in range(start, len(entries)):
+            if not entries[i].cancelled:
+                yield entries[i]
+    
+    def peek(self):
+        """Return the head entry, or None if the lane is empty"""
+        if self.head < len(self.entries):
+            return self.entries[self.head]
+        return None
+    
+    def __iter__(self):
+        for i in range(self.head, len(self.entries)):
+            yield self.entries[i]
+    
+    def append(self, entry):
+        self.entries.append(entry)
+    
+    def popleft(self):
+        entry = self.entries[self.head]
+        if entry.cancelled:
+            self.dead_head += 1
+        self.entries[self.head] = None  # Release the popped entry
+        self.head += 1
+        if self.head == len(self.entries):
+            self.clear()
+        elif self.head >= self.TRIM_MIN and self.head * 2 >= len(self.entries):
+            del self.entries[:self.head]
+            del self.dead[:self.dead_head]
+            self.offset += self.head
+            self.head = 0
+            self.dead_head = 0
+        return entry
+    
+    def clear(self):
+        self.offset += len(self.entries)
+        self.entries = []
+        self.head = 0
+        self.dead = []
+        self.dead_head = 0
+
+class OrderQueueManager:
+    """Manages the order queue with priority handling"""
+    # Compact the lanes once tombstones outnumber live orders (and at least this many)
+    COMPACT_MIN_TOMBSTONES = 64
+    # An order is at risk once it has less slack than this (seconds)
+    RISK_MARGIN_SECONDS = 2 * 60
+    
+    def __init__(self, aging=None, dispatch_log_size=1000, menu=None, scheduling=SCHEDULING_PRIORITY,
+                 overdue_limit=None):
+        if scheduling not in (SCHEDULING_PRIORITY, SCHEDULING_EDF):
+            raise ValueError(f"unknown scheduling mode: {scheduling!r}")
+        if scheduling == SCHEDULING_EDF and aging is not None:
+            raise ValueError("aging only applies to priority scheduling")
+        self.scheduling = scheduling
+        self.edf = scheduling == SCHEDULING_EDF
+        
+        # One FIFO lane per priority level keeps enqueue O(1). Within a lane
+        # the head has waited longest, so it also has the best aged priority;
+        # dispatch only has to compare the lane heads, never the whole queue.
+        self.lanes = [OrderLane() for _ in PRIORITY_NAMES]
+        # EDF mode keeps two lanes sorted by deadline instead. An order that
+        # can no longer make its deadline moves from `on_time` to `late` once
+        # its latest start passes (`starts` is a heap of those times), and
+        # waits until no order that can still make it is queued, or until it
+        # is `overdue_limit` seconds past its deadline; otherwise one late
+        # order makes the orders behind it late too. The dispatch order is
+        # then three runs of the two lanes, so windows index straight in.
+        self.on_time = OrderLane(key=_deadline_key)
+        self.late = OrderLane(key=_deadline_key)
+        self.starts = []
+        # Items of `starts` whose order has left `on_time` some other way
+        self.stale_starts = 0
+        self.overdue_limit = overdue_limit
+        self.next_order_id = 1001  # Starting order ID
+        
+        # order_id -> live QueueEntry, for O(1) lookup, cancel and promote
+        self.index = {}
+        self.tombstones = 0
+        self._seq = 0
+        
+        # Live orders per priority level
+        self.level_counts = [0] * len(PRIORITY_NAMES)
+        
+        # Optional aging curve: wait_seconds -> priority levels gained.
+        # Must never decrease as the wait grows.
+        self.aging = aging
+        
+        # (order_id, priority, age_seconds) of recently dispatched orders,
+        # used to tune the aging curve
+        self.dispatch_log = deque(maxlen=dispatch_log_size)
+        
+        # Bumped on every change to the queue, so iterators can detect it
+        self.version = 0
+        
+        # Running totals for stats()
+        self.enqueued_total = 0
+        self.dispatched_total = 0
+        self.cancelled_total = 0
+        # No queued order has a lower ID than this
+        self._oldest_id = self.next_order_id
+        
+        # Callables notified of every change as listener(event, order),
+        # where event is "add", "process", "cancel", "promote" or "clear"
+        self.listeners = []
+        
+        # Catalog the items of every queued order are parsed against
+        self.menu = menu if menu is not None else MenuCatalog()
+    
+    def _notify(self, event, order=None):
+        for listener in self.listeners:
+            listener(event, order)
+    
+    def __len__(self):
+        return len(self.index)
+    
+    def __contains__(self, order_id):
+        return order_id in self.index
+    
+    def __iter__(self):
+        return self.iter_orders()
+    
+    def _enqueue(self, order, now):
+        """Add the order to its priority lane, as having joined it at `now`
+        
+        Lanes are ordered by join time, so this is the back of the lane
+        unless the order joined earlier (a restored or promoted order).
+        Like every `now` in this class, `now` is a time.monotonic_ns() reading.
+        """
+        if order.lines is None:
+            order.items, order.lines = self.menu.parse(order.items)
+        entry = QueueEntry(order, self._seq, now)
+        self._seq += 1
+        if self.edf:
+            self.on_time.insert(entry)
+            heapq.heappush(self.starts, (_latest_start_ns(order), entry.seq, entry))
+        else:
+            self.lanes[order.priority].insert(entry)
+        self.index[order.order_id] = entry
+        self.level_counts[order.priority] += 1
+        return entry
+    
+    def add_orders(self, orders):
+        """Add a batch of orders, returning them in order
+        
+        Each is (items, priority) or (items, priority, deadline, prep_seconds).
+        """
+        return [self.add_order(items, False, *fields) for items, *fields in orders]
+    
+    def add_order(self, items, is_vip=False, priority=None, deadline=None, prep_seconds=None):
+        """Add an order to the queue with VIP priority
+        
+        `deadline` is the promised delivery time in epoch seconds; by default
+        it is DEFAULT_SLA_SECONDS for the priority after the order is placed.
+        """
+        deadline_ns = epoch_to_monotonic_ns(deadline) if deadline is not None else None
+        order = Order(self.next_order_id, items, is_vip, priority,
+                      deadline_ns=deadline_ns, prep_seconds=prep_seconds)
+        self.next_order_id += 1
+        
+        # Orders go after the last order of the same priority
+        self._enqueue(order, order.created_ns)
+        self.enqueued_total += 1
+        self.version += 1
+        self._notify("add", order)
+        
+        return order
+    
+    def restore_order(self, order, enqueued_at=None):
+        """Queue an existing order, e.g. one recovered from disk, behind its priority level
+        
+        `enqueued_at` is the datetime it joined that level, by default its creation.
+        """
+        if enqueued_at is None:
+            joined_ns = order.created_ns
+        else:
+            joined_ns = epoch_to_monotonic_ns(enqueued_at.timestamp())
+        self._enqueue(order, joined_ns)
+        self.next_order_id = max(self.next_order_id, order.order_id + 1)
+        self._oldest_id = min(self._oldest_id, order.order_id)
+        self.version += 1
+    
+    def get(self, order_id):
+        """Return the queued order with this ID, or None"""
+        entry = self.index.get(order_id)
+        return entry.order if entry is not None else None
+    
+    def enqueued_at(self, order_id):
+        """Return the datetime a queued order joined its current priority level, or None"""
+        entry = self.index.get(order_id)
+        if entry is None:
+            return None
+        return datetime.fromtimestamp(monotonic_ns_to_epoch(entry.joined_ns))
+    
+    def cancel(self, order_id):
+        """Remove an order from the queue, returning it (or None if not queued)"""
+        order = self._remove(order_id)
+        if order is None:
+            return None
+        
+        self.cancelled_total += 1
+        self.version += 1
+        self._notify("cancel", order)
+        self._maybe_compact()
+        return order
+    
+    def _remove(self, order_id):
+        """Take a queued order out of its lane, returning it (or None)"""
+        entry = self.index.pop(order_id, None)
+        if entry is None:
+            return None
+        
+        # Leave a tombstone in the lane instead of removing the entry
+        entry.cancelled = True
+        if not self.edf:
+            self.lanes[entry.order.priority].kill(entry)
+        elif self.on_time.kill(entry):
+            self._discard_start()
+        else:
+            self.late.kill(entry)
+        self.tombstones += 1
+        self.level_counts[entry.order.priority] -= 1
+        return entry.order
+    
+    def promote(self, order_id, priority):
+        """Move a queued order to another priority level, returning it (or None)"""
+        order = self.get(order_id)
+        if order is None or order.priority == priority:
+            return order
+        
+        order = self._move(order_id, priority, time.monotonic_ns())
+        self.version += 1
+        self._notify("promote", order)
+        self._maybe_compact()
+        return order
+    
+    def _move(self, order_id, priority, now):
+        """Tombstone an order's slot and add it to another lane
+        
+        Without aging the order goes to the back of the lane. With aging it
+        keeps its join time and takes its wait-ordered place, so promoting
+        an order never lowers its aged priority.
+        """
+        if self.aging is not None:
+            now = self.index[order_id].joined_ns
+        order = self._remove(order_id)
+        # A promotion may bring the promised delivery forward, never back:
+        # keep the old one if the new priority's default is later. The
+        # deadline is only changed out of its lane, which is sorted by it.
+        due_ns = order.due_ns
+        order.priority = priority
+        if order.due_ns > due_ns:
+            order.deadline_ns = due_ns
+        self._enqueue(order, now)
+        return order
+    
+    def _maybe_compact(self):
+        """Drop tombstones once they outnumber live orders"""
+        if self.tombstones >= self.COMPACT_MIN_TOMBSTONES and self.tombstones > len(self):
+            self.compact()
+    
+    def compact(self):
+        """Remove all tombstones from the lanes"""
+        if self.edf:
+            self.on_time = OrderLane((entry for entry in self.on_time if not entry.cancelled),
+                                     key=_deadline_key)
+            self.late = OrderLane((entry for entry in self.late if not entry.cancelled),
+                                  key=_deadline_key)
+            self._rebuild_starts()
+        else:
+            for level, lane in enumerate(self.lanes):
+                self.lanes[level] = OrderLane(entry for entry in lane if not entry.cancelled)
+        self.tombstones = 0
+    
+    def at_risk(self, order, now=None):
+        """Whether an order has less than RISK_MARGIN_SECONDS of slack left"""
+        return order.slack_seconds(now) < self.RISK_MARGIN_SECONDS
+    
+    def at_risk_orders(self, now=None):
+        """Return the queued orders at risk of missing their deadline, least slack first"""
+        if now is None:
+            now = time.monotonic_ns()
+        orders = [entry.order for entry in self.index.values() if self.at_risk(entry.order, now)]
+        orders.sort(key=lambda order: order.slack_seconds(now))
+        return orders
+    
+    def effective_priority(self, order, now=None):
+        """Return the order's priority after aging (lower is served first)
+        
+        `now` is a time.monotonic_ns() reading; it defaults to the current one.
+        """
+        entry = self.index.get(order.order_id)
+        if entry is None or self.aging is None:
+            return order.priority
+        if now is None:
+            now = time.monotonic_ns()
+        return self._aged_priority(entry, now)
+    
+    def _aged_priority(self, entry, now):
+        wait = (now - entry.joined_ns) / 1e9
+        return entry.order.priority - self.aging(wait)
+    
+    def _aged_key(self, now):
+        """Return the key entries are dispatched by with aging, as of `now`
+        
+        Ties in aged priority go to the order that joined first. The key
+        never decreases along a lane, as an entry that joined earlier has
+        waited longer and so aged at least as far.
+        """
+        aging = self.aging
+        
+        def key(entry):
+            # _aged_priority, inlined: this runs for every comparison
+            return entry.order.priority - aging((now - entry.joined_ns) / 1e9), entry.joined_ns, entry.seq
+        return key
+    
+    def _head(self, lane):
+        """Return the first live entry of a lane, discarding leading tombstones"""
+        entry = lane.peek()
+        while entry is not None and entry.cancelled:
+            lane.popleft()
+            self.tombstones -= 1
+            entry = lane.peek()
+        return entry
+    
+    def _pop_next(self, now):
+        """Remove and return the next order to dispatch, or None"""
+        if self.edf:
+            lane = self._next_deadline_lane(now)
+            if lane is None:
+                return None
+            entry = lane.popleft()
+            if lane is self.on_time:
+                # Its item in `starts` is left behind
+                entry.cancelled = True
+                self._discard_start()
+            order = entry.order
+        else:
+            lane = self._next_lane(now)
+            if lane is None:
+                return None
+            order = lane.popleft().order
+        
+        del self.index[order.order_id]
+        self.level_counts[order.priority] -= 1
+        return order
+    
+    def _advance(self, now):
+        """Move the orders that would be late even if started now to the late lane
+        
+        This changes where orders are kept, not what is queued, so the
+        version is not bumped.
+        """
+        starts = self.starts
+        while starts and starts[0][0] < now:
+            entry = heapq.heappop(starts)[2]
+            if entry.cancelled:
+                self.stale_starts -= 1
+                continue
+            self.on_time.kill(entry)
+            entry.cancelled = True
+            self.tombstones += 1
+            late = QueueEntry(entry.order, entry.seq, entry.joined_ns)
+            self.late.insert(late)
+            self.index[entry.order.order_id] = late
+    
+    def _discard_start(self):
+        """Count a stale item in `starts`, rebuilding the heap once they are half of it"""
+        self.stale_starts += 1
+        if self.stale_starts >= self.COMPACT_MIN_TOMBSTONES and self.stale_starts * 2 > len(self.starts):
+            self._rebuild_starts()
+    
+    def _rebuild_starts(self):
+        self.starts = [(_latest_start_ns(entry.order), entry.seq, entry)
+                       for entry in self.on_time if not entry.cancelled]
+        heapq.heapify(self.starts)
+        self.stale_starts = 0
+    
+    def _next_deadline_lane(self, now):
+        """Return the EDF lane whose head should be dispatched next, or None"""
+        self._advance(now)
+        entry = self._head(self.on_time)
+        late = self._head(self.late)
+        if late is None:
+            return self.on_time if entry is not None else None
+        if entry is None or self._past_overdue_limit(late.order, now):
+            return self.late
+        return self.on_time
+    
+    def _past_overdue_limit(self, order, now):
+        if self.overdue_limit is None:
+            return False
+        return now - order.due_ns >= self.overdue_limit * 1e9
+    
+    def _next_lane(self, now):
+        """Return the lane whose head should be dispatched next"""
+        best_lane = None
+        best_key = None
+        for lane in self.lanes:
+            head = self._head(lane)
+            if head is None:
+                continue
+            if self.aging is None:
+                # Strict tiers: the first non-empty lane wins
+                return lane
+            key = (self._aged_priority(head, now), head.joined_ns, head.seq)
+            if best_key is None or key < best_key:
+                best_lane, best_key = lane, key
+        return best_lane
+    
+    def process_next_order(self):
+        """Process the order at the front of the queue"""
+        return self._dispatch(time.monotonic_ns())
+    
+    def process_batch(self, n):
+        """Process up to n orders from the front of the queue, returning them in order
+        
+        The batch shares one dispatch time, so every order is aged against
+        the same clock and the clock is read once instead of n times.
+        """
+        now = time.monotonic_ns()
+        orders = []
+        while len(orders) < n:
+            order = self._dispatch(now)
+            if order is None:
+                break
+            orders.append(order)
+        return orders
+    
+    def _dispatch(self, now):
+        """Remove the next order, record its wait and notify listeners"""
+        order = self._pop_next(now)
+        if order is None:
+            return None
+        
+        order.dispatch_age = order.wait_seconds(now)
+        self.dispatch_log.append((order.order_id, order.priority, order.dispatch_age))
+        self.dispatched_total += 1
+        self.version += 1
+        self._notify("process", order)
+        return order
+    
+    def oldest_order(self):
+        """Return the queued order that was placed first, or None"""
+        # Order IDs only grow, so the pointer only moves forward:
+        # each ID is skipped at most once over the manager's lifetime
+        while self._oldest_id < self.next_order_id and self._oldest_id not in self:
+            self._oldest_id += 1
+        return self.get(self._oldest_id)
+    
+    def stats(self):
+        """Return a snapshot of the queue counters without scanning the queue"""
+        oldest = self.oldest_order()
+        return {
+            "total": len(self),
+            "by_priority": dict(zip(PRIORITY_NAMES, self.level_counts)),
+            "oldest_timestamp": oldest.timestamp if oldest is not None else None,
+            "oldest_wait_seconds": oldest.wait_seconds() if oldest is not None else None,
+            "enqueued_total": self.enqueued_total,
+            "dispatched_total": self.dispatched_total,
+            "cancelled_total": self.cancelled_total,
+        }
+    
+    def _iter_aged(self, start, stop):
+        """Yield the orders at positions start..stop-1 in aged dispatch order as of now"""
+        # Each lane is already sorted by aged priority, so merging the
+        # lanes gives the dispatch order; each lane's part of the window
+        # starts where bisecting the lanes for position `start` says
+        now = time.monotonic_ns()
+        key = self._aged_key(now)
+        views = [LaneKeys(lane.entry_at, lane.live(), key) for lane in self.lanes]
+        firsts = split_merge(views, start)
+        merged = heapq.merge(*(lane.iter_from(first) for lane, first in zip(self.lanes, firsts)), key=key)
+        for entry in itertools.islice(merged, stop - start):
+            yield entry.order
+    
+    def _iter_deadline(self, start, stop):
+        """Yield the orders at positions start..stop-1 in EDF order as of now
+        
+        Orders past the overdue limit come first, then those that can still
+        make their deadline, then the other late ones, each by deadline.
+        The first and last runs are split from the late lane by bisection.
+        """
+        now = time.monotonic_ns()
+        self._advance(now)
+        late = self.late
+        if self.overdue_limit is None:
+            urgent = 0
+        else:
+            urgent = late.count_before((now - self.overdue_limit * 1e9, float("inf")))
+        runs = [(late, 0, urgent), (self.on_time, 0, self.on_time.live()), (late, urgent, late.live())]
+        return self._iter_runs(runs, start, stop)
+    
+    def get_queue(self):
+        """Return a copy of the current queue (prefer iter_orders or peek)"""
+        if self.edf:
+            return list(self._iter_deadline(0, len(self)))
+        if self.aging is None:
+            return [entry.order for lane in self.lanes for entry in lane if not entry.cancelled]
+        return list(self._iter_aged(0, len(self)))
+    
+    def iter_orders(self, start=0, stop=None):
+        """Yield the orders at queue positions start..stop-1, in dispatch order
+        
+        Nothing is copied and the queue is not modified. Without aging, and
+        with EDF, this costs O(stop - start) plus the tombstones inside the
+        window and a bisection per lane; with aging the lanes are bisected
+        for the window's start (see split_merge) and merged from there.
+        Raises RuntimeError if the queue changes while iterating.
+        """
+        if stop is None or stop > len(self):
+            stop = len(self)
+        if start >= stop:
+            return
+        
+        if self.edf:
+            source = self._iter_deadline(start, stop)
+        elif self.aging is not None:
+            source = self._iter_aged(start, stop)
+        else:
+            source = self._iter_range(start, stop)
+        
+        version = self.version
+        for order in source:
+            yield order
+            if self.version != version:
+                raise RuntimeError("order queue changed during iteration")
+    
+    def peek(self, n=1):
+        """Return the next n orders to be dispatched, without removing them"""
+        return list(self.iter_orders(0, n))
+    
+    def _iter_range(self, start, stop):
+        """Yield the orders at positions start..stop-1 by indexing into the lanes"""
+        return self._iter_runs([(lane, 0, lane.live()) for lane in self.lanes], start, stop)
+    
+    def _iter_runs(self, runs, start, stop):
+        """Yield the orders at positions start..stop-1 of runs laid end to end
+        
+        Each run is (lane, first, last): the live entries first..last-1 of the lane.
+        """
+        offset = 0  # Queue position of the current run's first entry
+        for lane, first, last in runs:
+            size = last - first
+            lo, hi = max(start - offset, 0), min(stop - offset, size)
+            if lo < hi:
+                for entry in itertools.islice(lane.iter_from(first + lo), hi - lo):
+                    yield entry.order
+            offset += size
+            if offset >= stop:
+                break
+    
+    def is_empty(self):
+        """Check if queue is empty"""
+        return not self.index
+    
+    def clear_queue(self):
+        """Clear the entire queue"""
+        self._clear_storage()
+        self._oldest_id = self.next_order_id
+        self.version += 1
+        self._notify("clear")
+    
+    def _clear_storage(self):
+        for lane in self.lanes:
+            lane.clear()
+        self.on_time.clear()
+        self.late.clear()
+        self.starts = []
+        self.stale_starts = 0
+        self.index.clear()
+        self.tombstones = 0
+        self.level_counts = [0] * len(PRIORITY_NAMES)
+
+def format_wait(seconds):
+    """Format a wait time compactly: 0.4s, 12s, 3m 05s"""
+    if seconds < 10:
+        return f"{seconds:.1f}s"
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    return f"{seconds // 60}m {seconds % 60:02d}s"
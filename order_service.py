@@ -0,0 +1,272 @@
+"""Headless order service around OrderQueueManager
+
+OrderService is the one entry point for changing the queue: the Tk GUI, the
+HTTP ingest endpoint and any other integration all go through it, and it
+serializes their calls with a lock.
+
+HTTP endpoint (start with OrderService.start_server()):
+    POST /orders        JSON order or list of orders:
+                        {"items": "Burger, Fries", "priority": "VIP"}
+                        -> 201 {"order_ids": [1001, ...]}; optional
+                        "deadline" (epoch seconds) and "prep_seconds"
+                        are used by EDF scheduling
+    POST /orders/next   Dispatch the next order -> 200 {"order": {...}}, 204 if empty;
+                        the order's "lines" list its parsed items and quantities
+    POST /stations/free Signal that kitchen stations are free, optional body
+                        {"count": 2} -> 200 {"free_stations": 2}; auto-dispatch
+                        sends one order per signal
+    GET  /stats         Queue statistics snapshot
+    GET  /metrics       Wait-time percentiles, throughput and depth, in the
+                        Prometheus text format
+"""
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from order_queue import (OrderQueueManager, PRIORITY_NAMES, PRIORITY_NORMAL, PRIORITY_VIP,
+                         SCHEDULING_PRIORITY)
+from queue_metrics import QueueMetrics
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+def parse_priority(value):
+    """Turn a priority name or level number into a level number"""
+    if isinstance(value, bool):
+        raise ValueError(f"invalid priority: {value!r}")
+    if isinstance(value, int):
+        if 0 <= value < len(PRIORITY_NAMES):
+            return value
+    elif isinstance(value, str):
+        names = [name.lower() for name in PRIORITY_NAMES]
+        if value.lower() in names:
+            return names.index(value.lower())
+    raise ValueError(f"invalid priority: {value!r}")
+
+
+def parse_seconds(name, value):
+    """Check that an optional time field is a finite number; None passes through"""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"invalid {name}: {value!r}")
+    return value
+
+
+def order_to_dict(order, menu=None):
+    """JSON-friendly view of an order, with its parsed lines if a menu is given"""
+    result = {
+        "order_id": order.order_id,
+        "items": order.items,
+        "priority": order.priority_name,
+        "timestamp": order.timestamp.isoformat(),
+        "dispatch_age": order.dispatch_age,
+        "deadline": order.deadline,
+    }
+    if menu is not None and order.lines is not None:
+        result["lines"] = [{"item": menu.name(item_id), "qty": qty} for item_id, qty in order.lines]
+    return result
+
+
+class OrderService:
+    """Thread-safe facade over an OrderQueueManager
+
+    Without a manager, one is created with the given scheduling mode.
+    """
+    def __init__(self, manager=None, scheduling=SCHEDULING_PRIORITY):
+        if manager is None:
+            manager = OrderQueueManager(scheduling=scheduling)
+        self.manager = manager
+        # Reentrant so callers can hold it across several service calls
+        self.lock = threading.RLock()
+        self.server = None
+        self.metrics = QueueMetrics(self.manager)
+        # Free-station signals not yet served by a dispatcher
+        self.free_stations = 0
+
+    def add_order(self, items, priority=PRIORITY_NORMAL, deadline=None, prep_seconds=None):
+        """Validate and queue one order
+
+        `deadline` is in epoch seconds; see OrderQueueManager.add_order.
+        """
+        items = items.strip() if isinstance(items, str) else ""
+        if not items:
+            raise ValueError("order items must be a non-empty string")
+        priority = parse_priority(priority)
+        deadline, prep_seconds = self._parse_timing(deadline, prep_seconds)
+        with self.lock:
+            return self.manager.add_order(items, priority=priority, deadline=deadline,
+                                          prep_seconds=prep_seconds)
+
+    @staticmethod
+    def _parse_timing(deadline, prep_seconds):
+        deadline = parse_seconds("deadline", deadline)
+        prep_seconds = parse_seconds("prep_seconds", prep_seconds)
+        if prep_seconds is not None and prep_seconds < 0:
+            raise ValueError(f"invalid prep_seconds: {prep_seconds!r}")
+        return deadline, prep_seconds
+
+    def add_orders(self, orders):
+        """Validate and queue a batch of orders under a single lock acquisition
+
+        Each order is a dict with "items", optional "priority" (name or
+        level) or "is_vip", and optional "deadline" and "prep_seconds". The
+        whole batch is validated before any order is queued, so a bad order
+        rejects the batch.
+        """
+        batch = []
+        for spec in orders:
+            if not isinstance(spec, dict):
+                raise ValueError("each order must be an object")
+            items = spec.get("items")
+            items = items.strip() if isinstance(items, str) else ""
+            if not items:
+                raise ValueError("order items must be a non-empty string")
+            if "priority" in spec:
+                priority = parse_priority(spec["priority"])
+            else:
+                priority = PRIORITY_VIP if spec.get("is_vip") else PRIORITY_NORMAL
+            deadline, prep_seconds = self._parse_timing(spec.get("deadline"), spec.get("prep_seconds"))
+            batch.append((items, priority, deadline, prep_seconds))
+
+        with self.lock:
+            return self.manager.add_orders(batch)
+
+    def process_next_order(self):
+        with self.lock:
+            return self.manager.process_next_order()
+
+    def process_batch(self, n):
+        """Dispatch up to n orders under a single lock acquisition"""
+        with self.lock:
+            return self.manager.process_batch(n)
+
+    def cancel(self, order_id):
+        with self.lock:
+            return self.manager.cancel(order_id)
+
+    def station_free(self, count=1):
+        """Signal that kitchen stations can take `count` more orders
+
+        The signals are held until a dispatcher takes them with
+        take_free_stations(); returns how many are held.
+        """
+        if isinstance(count, bool) or not isinstance(count, int) or count < 1:
+            raise ValueError(f"invalid station count: {count!r}")
+        with self.lock:
+            self.free_stations += count
+            return self.free_stations
+
+    def take_free_stations(self):
+        """Return the free-station signals held so far and reset them"""
+        with self.lock:
+            count, self.free_stations = self.free_stations, 0
+            return count
+
+    def promote(self, order_id, priority):
+        priority = parse_priority(priority)
+        with self.lock:
+            return self.manager.promote(order_id, priority)
+
+    def clear_queue(self):
+        with self.lock:
+            self.manager.clear_queue()
+
+    def stats(self):
+        with self.lock:
+            return self.manager.stats()
+
+    def metrics_snapshot(self):
+        with self.lock:
+            self.metrics.tick()
+            return self.metrics.snapshot()
+
+    def metrics_text(self):
+        with self.lock:
+            self.metrics.tick()
+            return self.metrics.prometheus_text()
+
+    def start_server(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Serve the HTTP ingest endpoint from a background thread"""
+        self.server = ThreadingHTTPServer((host, port), OrderIngestHandler)
+        self.server.daemon_threads = True
+        self.server.service = self
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        return self.server
+
+    def stop_server(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+class OrderIngestHandler(BaseHTTPRequestHandler):
+    """HTTP handler for the order ingest endpoint"""
+    # Keep-alive lets integrations stream batches over one connection;
+    # without TCP_NODELAY each reply would wait on the client's delayed ACK
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        service = self.server.service
+        if self.path == "/orders":
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                orders = service.add_orders(payload if isinstance(payload, list) else [payload])
+            except ValueError as e:
+                self.send_json(400, {"error": str(e)})
+                return
+            self.send_json(201, {"order_ids": [order.order_id for order in orders]})
+        elif self.path == "/orders/next":
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            order = service.process_next_order()
+            if order is None:
+                self.send_json(204, None)
+            else:
+                self.send_json(200, {"order": order_to_dict(order, service.manager.menu)})
+        elif self.path == "/stations/free":
+            try:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                payload = json.loads(body) if body.strip() else {}
+                if not isinstance(payload, dict):
+                    raise ValueError("body must be an object")
+                held = service.station_free(payload.get("count", 1))
+            except ValueError as e:
+                self.send_json(400, {"error": str(e)})
+                return
+            self.send_json(200, {"free_stations": held})
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_GET(self):
+        if self.path == "/stats":
+            stats = self.server.service.stats()
+            oldest = stats["oldest_timestamp"]
+            stats["oldest_timestamp"] = oldest.isoformat() if oldest is not None else None
+            self.send_json(200, stats)
+        elif self.path == "/metrics":
+            body = self.server.service.metrics_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def send_json(self, status, payload):
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # One line per request would dominate the cost of ingesting orders
+        pass
@@ -0,0 +1,207 @@
+"""Write-ahead log for OrderQueueManager
+
+Every change to the queue is appended to a log file as one JSON line. Lines
+are fsynced in groups (group commit), a snapshot of the queue is written
+every so often and the log is then truncated. On startup recover() loads the
+snapshot, replays the log on top of it and rebuilds the queue and the order
+ID counter, so a crash or restart neither loses orders nor reuses IDs.
+
+Usage:
+    manager = OrderQueueManager()
+    wal = OrderWAL("orders.wal")
+    wal.recover(manager)  # Rebuilds the queue, then logs every change
+"""
+import json
+import os
+import time
+from datetime import datetime
+
+from order_queue import Order, epoch_to_monotonic_ns, monotonic_ns_to_epoch
+
+
+def _own_deadline(order):
+    """An order's own deadline in epoch seconds, or None if it has the default one"""
+    if order.deadline_ns is None:
+        return None
+    return monotonic_ns_to_epoch(order.deadline_ns)
+
+
+class OrderWAL:
+    """Append-only, group-committed log of order queue changes"""
+    def __init__(self, path, sync_every=64, sync_interval=0.05, snapshot_every=10000):
+        self.path = path
+        self.snapshot_path = path + ".snapshot"
+
+        # Group commit: fsync once `sync_every` records are pending, or on the
+        # first append after `sync_interval` seconds. sync_every=1 fsyncs
+        # every record.
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        # Write a snapshot and truncate the log after this many records
+        self.snapshot_every = snapshot_every
+
+        self.manager = None
+        self.file = None
+        self.seq = 0  # Sequence number of the last record written
+        self.pending = 0  # Records written but not yet fsynced
+        self.records_since_snapshot = 0
+        self.last_sync = time.monotonic()
+
+    def recover(self, manager):
+        """Rebuild the manager's queue from disk and start logging its changes"""
+        snapshot_seq = 0
+        next_order_id = manager.next_order_id
+        # order_id -> [order, joined_at, join_seq] for every order still queued
+        queued = {}
+
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            snapshot_seq = snapshot["seq"]
+            next_order_id = max(next_order_id, snapshot["next_order_id"])
+            # Snapshot orders get negative join positions so they stay ahead
+            # of anything the log adds or promotes afterwards
+            join_seq = -len(snapshot["orders"])
+            for order_id, items, priority, timestamp, joined_at, *sla in snapshot["orders"]:
+                order = Order(order_id, items, priority=priority, created_at=timestamp)
+                # Snapshots written before deadlines were kept have no SLA fields
+                if sla:
+                    self._restore_sla(order, *sla)
+                queued[order_id] = [order, datetime.fromtimestamp(joined_at), join_seq]
+                join_seq += 1
+
+        self.seq = snapshot_seq
+        good_length = 0
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("incomplete record")
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn write from a crash: everything after it is lost
+                        break
+                    good_length += len(line)
+                    if record["seq"] <= snapshot_seq:
+                        # Already covered by the snapshot
+                        continue
+                    self.seq = record["seq"]
+                    next_order_id = max(next_order_id, self._replay(record, queued))
+
+        # Queue the surviving orders in the order they joined their lanes
+        for order, joined_at, _ in sorted(queued.values(), key=lambda item: item[2]):
+            manager.restore_order(order, joined_at)
+        manager.next_order_id = max(manager.next_order_id, next_order_id)
+
+        # Drop any torn tail so new records follow the last good one
+        self.file = open(self.path, "ab")
+        self.file.truncate(good_length)
+        self.attach(manager)
+
+    def _replay(self, record, queued):
+        """Apply one log record to the recovered orders, returning the next free order ID"""
+        op = record["op"]
+        if op == "add":
+            order = Order(record["id"], record["items"], priority=record["priority"],
+                          created_at=record["ts"])
+            self._restore_sla(order, record.get("deadline"), record.get("prep"))
+            queued[order.order_id] = [order, order.timestamp, record["seq"]]
+            return order.order_id + 1
+        if op in ("process", "cancel"):
+            queued.pop(record["id"], None)
+        elif op == "promote":
+            entry = queued.get(record["id"])
+            if entry is not None:
+                entry[0].priority = record["priority"]
+                self._restore_sla(entry[0], record.get("deadline"), entry[0].prep_seconds)
+                entry[1] = datetime.fromtimestamp(record["ts"])
+                entry[2] = record["seq"]
+        elif op == "clear":
+            queued.clear()
+        return 0
+
+    def _restore_sla(self, order, deadline, prep_seconds):
+        """Set a recovered order's deadline (epoch seconds) and prep estimate"""
+        if deadline is not None:
+            order.deadline_ns = epoch_to_monotonic_ns(deadline)
+        order.prep_seconds = prep_seconds
+
+    def attach(self, manager):
+        """Log every change the manager makes from now on"""
+        if self.file is None:
+            self.file = open(self.path, "ab")
+        self.manager = manager
+        manager.listeners.append(self.on_queue_event)
+
+    def on_queue_event(self, event, order):
+        """OrderQueueManager listener that turns queue changes into records"""
+        if event == "add":
+            record = {"op": "add", "id": order.order_id, "items": order.items,
+                      "priority": order.priority, "ts": order.created_at,
+                      "deadline": _own_deadline(order), "prep": order.prep_seconds}
+        elif event == "promote":
+            joined_at = self.manager.enqueued_at(order.order_id)
+            record = {"op": "promote", "id": order.order_id, "priority": order.priority,
+                      "ts": joined_at.timestamp(), "deadline": _own_deadline(order)}
+        elif event in ("process", "cancel"):
+            record = {"op": event, "id": order.order_id}
+        else:
+            record = {"op": event}
+        self.append(record)
+
+    def append(self, record):
+        """Write one record, fsyncing when the current group is due"""
+        self.seq += 1
+        record["seq"] = self.seq
+        self.file.write(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+        self.pending += 1
+        self.records_since_snapshot += 1
+
+        if self.pending >= self.sync_every or time.monotonic() - self.last_sync >= self.sync_interval:
+            self.sync()
+        if self.records_since_snapshot >= self.snapshot_every and self.manager is not None:
+            self.checkpoint()
+
+    def sync(self):
+        """Make every written record durable"""
+        if self.pending:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def checkpoint(self):
+        """Snapshot the queue and truncate the log"""
+        manager = self.manager
+        orders = [
+            [order.order_id, order.items, order.priority, order.created_at,
+             manager.enqueued_at(order.order_id).timestamp(), _own_deadline(order), order.prep_seconds]
+            for order in manager.iter_orders()
+        ]
+        snapshot = {"seq": self.seq, "next_order_id": manager.next_order_id, "orders": orders}
+
+        # Write to a temporary file first so a crash never leaves a half
+        # written snapshot; records up to `seq` are skipped on replay, so a
+        # crash before the log is truncated is harmless too.
+        self.sync()
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+        self.file.truncate(0)
+        self.file.seek(0)
+        os.fsync(self.file.fileno())
+        self.records_since_snapshot = 0
+
+    def close(self):
+        """Flush outstanding records and stop logging"""
+        if self.manager is not None and self.on_queue_event in self.manager.listeners:
+            self.manager.listeners.remove(self.on_queue_event)
+        if self.file is not None:
+            self.sync()
+            self.file.close()
+            self.file = None
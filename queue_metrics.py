@@ -0,0 +1,209 @@
+"""Queue latency instrumentation for OrderQueueManager
+
+QueueMetrics listens to a manager and records, for every dispatched order,
+how long it waited between enqueue and dispatch in one histogram per
+priority tier. It also keeps dispatches per minute and samples of the queue
+depth over time. The numbers can be read with snapshot() or exported in the
+Prometheus text format:
+
+    metrics = QueueMetrics(manager)
+    metrics.snapshot()["wait"]["VIP"]["p99"]    # Seconds
+    metrics.write_prometheus("/var/lib/node_exporter/food_panda.prom")
+
+OrderService serves the same export at GET /metrics.
+"""
+import os
+import time
+from collections import deque
+
+from order_queue import PRIORITY_NAMES
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class LatencyHistogram:
+    """HDR-style histogram of durations
+
+    Values are bucketed log-linearly: every power of two is split into
+    2**SUB_BUCKET_BITS buckets, so a recorded value is known to within about
+    3% whatever its size, recording is O(1) and memory grows only with the
+    log of the largest value.
+    """
+    SUB_BUCKET_BITS = 5
+
+    def __init__(self, unit=1e-6):
+        # Durations are stored as whole multiples of `unit` seconds
+        self.unit = unit
+        self.counts = []
+        self.count = 0
+        self.total = 0.0  # Sum of recorded seconds
+        self.max = 0.0
+
+    def _index(self, value):
+        """Bucket index of a value in units"""
+        shift = value.bit_length() - self.SUB_BUCKET_BITS - 1
+        if shift <= 0:
+            return value
+        return (shift << self.SUB_BUCKET_BITS) + (value >> shift)
+
+    def _value(self, index):
+        """Midpoint in units of the bucket at an index"""
+        if index < 2 << self.SUB_BUCKET_BITS:
+            return index
+        shift = (index >> self.SUB_BUCKET_BITS) - 1
+        low = (index - (shift << self.SUB_BUCKET_BITS)) << shift
+        return low + (1 << shift) / 2
+
+    def record(self, seconds):
+        index = self._index(max(int(seconds / self.unit), 0))
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentiles(self, quantiles=QUANTILES):
+        """Return the value in seconds at each quantile, in one pass over the buckets"""
+        values = [None] * len(quantiles)
+        if not self.count:
+            return values
+        # Positions of the quantiles still to find, smallest first
+        pending = sorted(range(len(quantiles)), key=lambda i: quantiles[i])
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            while pending and seen >= quantiles[pending[0]] * self.count:
+                values[pending.pop(0)] = min(self._value(index) * self.unit, self.max)
+            if not pending:
+                break
+        return values
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+
+class QueueMetrics:
+    """Wait-time histograms, throughput and depth history for one manager"""
+    # Minutes of dispatch counts kept for throughput
+    THROUGHPUT_MINUTES = 60
+    # Queue depth is sampled at most this often (seconds), on queue events
+    DEPTH_SAMPLE_SECONDS = 1.0
+    # Depth samples kept (an hour at one per second)
+    DEPTH_SAMPLES = 3600
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.wait = [LatencyHistogram() for _ in PRIORITY_NAMES]
+
+        # [minute since the epoch, orders dispatched in it], oldest first
+        self.dispatches = deque(maxlen=self.THROUGHPUT_MINUTES)
+        # (epoch seconds, queue depth), oldest first
+        self.depth = deque(maxlen=self.DEPTH_SAMPLES)
+        self.last_sample = 0.0
+
+        manager.listeners.append(self.on_queue_event)
+
+    def close(self):
+        """Stop recording"""
+        if self.on_queue_event in self.manager.listeners:
+            self.manager.listeners.remove(self.on_queue_event)
+
+    def on_queue_event(self, event, order):
+        """OrderQueueManager listener"""
+        now = time.time()
+        if event == "process":
+            self.wait[order.priority].record(order.dispatch_age)
+            minute = int(now // 60)
+            if self.dispatches and self.dispatches[-1][0] == minute:
+                self.dispatches[-1][1] += 1
+            else:
+                self.dispatches.append([minute, 1])
+        if now - self.last_sample >= self.DEPTH_SAMPLE_SECONDS:
+            self.sample_depth(now)
+
+    def sample_depth(self, now=None):
+        """Record the current queue depth"""
+        if now is None:
+            now = time.time()
+        self.depth.append((now, len(self.manager)))
+        self.last_sample = now
+
+    def tick(self):
+        """Sample the depth if a sample is due; call periodically to cover idle spells"""
+        now = time.time()
+        if now - self.last_sample >= self.DEPTH_SAMPLE_SECONDS:
+            self.sample_depth(now)
+
+    def throughput(self, now=None):
+        """Orders dispatched in the last complete minute"""
+        if now is None:
+            now = time.time()
+        last_minute = int(now // 60) - 1
+        for minute, count in reversed(self.dispatches):
+            if minute == last_minute:
+                return count
+            if minute < last_minute:
+                break
+        return 0
+
+    def snapshot(self):
+        """Return the current metrics as plain data"""
+        wait = {}
+        for level, name in enumerate(PRIORITY_NAMES):
+            histogram = self.wait[level]
+            p50, p95, p99 = histogram.percentiles()
+            wait[name] = {"count": histogram.count, "mean": histogram.mean(),
+                          "p50": p50, "p95": p95, "p99": p99, "max": histogram.max}
+        depths = [depth for _, depth in self.depth]
+        return {
+            "wait": wait,
+            "throughput_per_minute": self.throughput(),
+            "depth": len(self.manager),
+            "depth_peak": max(depths, default=len(self.manager)),
+            "depth_history": list(self.depth),
+        }
+
+    def prometheus_text(self):
+        """Render the metrics in the Prometheus text exposition format"""
+        manager = self.manager
+        lines = [
+            "# HELP food_panda_order_wait_seconds Time orders waited from enqueue to dispatch.",
+            "# TYPE food_panda_order_wait_seconds summary",
+        ]
+        for level, name in enumerate(PRIORITY_NAMES):
+            histogram = self.wait[level]
+            for q, value in zip(QUANTILES, histogram.percentiles()):
+                value = "NaN" if value is None else f"{value:.6f}"
+                lines.append(f'food_panda_order_wait_seconds{{priority="{name}",quantile="{q}"}} {value}')
+            lines.append(f'food_panda_order_wait_seconds_sum{{priority="{name}"}} {histogram.total:.6f}')
+            lines.append(f'food_panda_order_wait_seconds_count{{priority="{name}"}} {histogram.count}')
+
+        lines += [
+            "# HELP food_panda_queue_depth Orders currently queued.",
+            "# TYPE food_panda_queue_depth gauge",
+        ]
+        for name, count in zip(PRIORITY_NAMES, manager.level_counts):
+            lines.append(f'food_panda_queue_depth{{priority="{name}"}} {count}')
+
+        lines += [
+            "# HELP food_panda_dispatched_last_minute Orders dispatched in the last complete minute.",
+            "# TYPE food_panda_dispatched_last_minute gauge",
+            f"food_panda_dispatched_last_minute {self.throughput()}",
+        ]
+        for counter, value in (("enqueued", manager.enqueued_total),
+                               ("dispatched", manager.dispatched_total),
+                               ("cancelled", manager.cancelled_total)):
+            lines += [
+                f"# HELP food_panda_orders_{counter}_total Orders {counter} since start.",
+                f"# TYPE food_panda_orders_{counter}_total counter",
+                f"food_panda_orders_{counter}_total {value}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Write the export to a file atomically, e.g. for node_exporter's textfile collector"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
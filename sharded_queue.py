@@ -0,0 +1,499 @@
+"""Order queues sharded across worker processes
+
+One OrderQueueManager per process is bound by one core. ShardedOrderQueue
+runs a worker process per shard; every restaurant branch belongs to one
+shard (a stable hash of its name), and each worker keeps a queue per branch
+it owns. The coordinator in the calling process routes requests to the
+owning worker and aggregates stats across shards:
+
+    with ShardedOrderQueue(shards=4) as queues:
+        order_id = queues.add_order("Gulshan", "Burger, Coke")
+        orders = queues.dispatch("Gulshan")     # [(order_id, items, priority, wait)]
+        queues.stats()["total"]
+
+Requests and replies travel through shared-memory ring buffers, one pair per
+worker, so no pipe or pickling sits on the hot path. The rings need x86
+store ordering; on other machines multiprocessing queues carry the messages
+instead. Adds need no reply: the
+coordinator hands out the order IDs (numbered per branch, as each branch's
+queue would), so add_order() returns at once and a burst of adds is sent as
+a few batch messages. dispatch_many() pipelines dispatches across shards.
+"""
+import marshal
+import multiprocessing
+import platform
+import queue
+import struct
+import time
+import zlib
+from collections import defaultdict
+from multiprocessing import shared_memory
+
+from order_queue import OrderQueueManager, PRIORITY_NAMES, PRIORITY_NORMAL
+
+# Request opcodes
+OP_ADD = 0      # (OP_ADD, [(branch, order_id, items, priority), ...])
+OP_DISPATCH = 1  # (OP_DISPATCH, branch, n) -> [(order_id, items, priority, dispatch_age)]
+OP_CANCEL = 2   # (OP_CANCEL, branch, order_id) -> bool
+OP_STATS = 3    # (OP_STATS,) -> dict
+OP_STOP = 4     # (OP_STOP,)
+
+FIRST_ORDER_ID = 1001
+
+# ShmRingBuffer needs stores to become visible to other cores in program
+# order, which x86 guarantees and e.g. ARM does not
+ORDERED_STORES = platform.machine().lower() in ("x86_64", "amd64", "i386", "i686", "x86")
+
+
+def shard_for(branch, shards):
+    """Shard that owns a branch; stable across processes and runs, unlike hash()"""
+    return zlib.crc32(branch.encode("utf-8")) % shards
+
+
+def _backoff(idle):
+    """Wait a little longer the longer a ring has been idle"""
+    if idle < 100:
+        return
+    time.sleep(0 if idle < 1000 else 0.0005)
+
+
+class ShmRingBuffer:
+    """Single-producer, single-consumer queue of byte messages in shared memory
+
+    The header holds two byte counters that only grow: `head`, written by
+    the consumer, and `tail`, written by the producer, each on its own cache
+    line. A message is a 4-byte length and the payload, padded to 8 bytes;
+    one that would run past the end of the buffer leaves a wrap marker and
+    starts again at the front. The producer writes the message before it
+    publishes the new tail, and the consumer reads it before publishing the
+    new head, which relies on stores becoming visible in program order.
+    x86 guarantees that, so the ring refuses to run anywhere else (see
+    QueueChannel). The counters are read and written through a
+    memoryview cast to "Q", which moves each as one aligned 8-byte word;
+    struct.pack_into zeroes its target before writing, so the other side
+    could read a counter as 0.
+    """
+    HEADER = 128
+    HEAD = 0  # Index of head in the header cast to 8-byte words
+    TAIL = 8
+    WRAP = 0xFFFFFFFF
+
+    def __init__(self, name=None, capacity=1 << 20):
+        if not ORDERED_STORES:
+            raise RuntimeError(f"ShmRingBuffer needs x86 store ordering, not {platform.machine()!r}")
+        if name is None:
+            if capacity % 8:
+                raise ValueError("capacity must be a multiple of 8")
+            self.shm = shared_memory.SharedMemory(create=True, size=self.HEADER + capacity)
+            self.shm.buf[:self.HEADER] = bytes(self.HEADER)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.name = self.shm.name
+        self.capacity = capacity
+        self.buf = self.shm.buf
+        self.counters = self.buf[:self.HEADER].cast("Q")
+
+    def put(self, payload):
+        """Append a message; False if there is no room for it yet"""
+        size = (4 + len(payload) + 7) & ~7
+        if size > self.capacity // 2:
+            raise ValueError(f"message of {len(payload)} bytes is too large for the ring")
+        counters = self.counters
+        tail = counters[self.TAIL]
+        free = self.capacity - (tail - counters[self.HEAD])
+        pos = tail % self.capacity
+        skip = self.capacity - pos if size > self.capacity - pos else 0
+        if skip + size > free:
+            return False
+
+        buf = self.buf
+        if skip:
+            struct.pack_into("<I", buf, self.HEADER + pos, self.WRAP)
+            tail += skip
+            pos = 0
+        start = self.HEADER + pos
+        struct.pack_into("<I", buf, start, len(payload))
+        buf[start + 4:start + 4 + len(payload)] = payload
+        counters[self.TAIL] = tail + size
+        return True
+
+    def get(self):
+        """Remove and return the oldest message, or None if the ring is empty"""
+        counters = self.counters
+        head = counters[self.HEAD]
+        if head == counters[self.TAIL]:
+            return None
+
+        buf = self.buf
+        pos = head % self.capacity
+        length = struct.unpack_from("<I", buf, self.HEADER + pos)[0]
+        if length == self.WRAP:
+            head += self.capacity - pos
+            pos = 0
+            length = struct.unpack_from("<I", buf, self.HEADER)[0]
+        start = self.HEADER + pos + 4
+        payload = bytes(buf[start:start + length])
+        counters[self.HEAD] = head + ((4 + length + 7) & ~7)
+        return payload
+
+    def close(self):
+        """Detach, and free the memory if this side created it"""
+        self.counters.release()
+        self.buf = self.counters = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class QueueChannel:
+    """multiprocessing.Queue of byte messages with ShmRingBuffer's put/get
+
+    Used instead of the rings where ORDERED_STORES is false. put() never
+    waits: a feeder thread writes the messages to the pipe behind it.
+    """
+    def __init__(self, context, capacity):
+        self.queue = context.Queue()
+        self.capacity = capacity
+
+    def put(self, payload):
+        """Append a message; always True, as the queue has no fixed size"""
+        if (4 + len(payload) + 7) & ~7 > self.capacity // 2:
+            raise ValueError(f"message of {len(payload)} bytes is too large for the ring")
+        self.queue.put(payload)
+        return True
+
+    def get(self):
+        """Remove and return the oldest message, or None if none has arrived"""
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.queue.close()
+
+
+def _utf8_size(text):
+    """Bytes marshal takes for a string's characters"""
+    return len(text) if text.isascii() else len(text.encode("utf-8", "surrogatepass"))
+
+
+def _order_reply(order):
+    return (order.order_id, order.items, order.priority, order.dispatch_age)
+
+
+class ShardWorker:
+    """A shard's branch queues, run in a worker process by serve()"""
+    def __init__(self, shard, aging=None):
+        self.shard = shard
+        self.aging = aging
+        self.queues = {}  # branch -> OrderQueueManager
+
+    def queue(self, branch):
+        manager = self.queues.get(branch)
+        if manager is None:
+            manager = self.queues[branch] = OrderQueueManager(self.aging)
+        return manager
+
+    def handle(self, request):
+        """Apply one request; returns (has_reply, reply)"""
+        op = request[0]
+        if op == OP_ADD:
+            for branch, order_id, items, priority in request[1]:
+                manager = self.queue(branch)
+                manager.next_order_id = order_id
+                manager.add_order(items, priority=priority)
+            return False, None
+        if op == OP_DISPATCH:
+            manager = self.queues.get(request[1])
+            if manager is None:
+                return True, []
+            return True, [_order_reply(order) for order in manager.process_batch(request[2])]
+        if op == OP_CANCEL:
+            manager = self.queues.get(request[1])
+            return True, manager is not None and manager.cancel(request[2]) is not None
+        if op == OP_STATS:
+            return True, self.stats()
+        raise ValueError(f"unknown request {op!r}")
+
+    def stats(self):
+        """Counters summed over this shard's branches"""
+        by_priority = [0] * len(PRIORITY_NAMES)
+        totals = {"total": 0, "enqueued_total": 0, "dispatched_total": 0, "cancelled_total": 0}
+        oldest_wait = None
+        for manager in self.queues.values():
+            stats = manager.stats()
+            for key in totals:
+                totals[key] += stats[key]
+            for level, count in enumerate(manager.level_counts):
+                by_priority[level] += count
+            if stats["oldest_wait_seconds"] is not None:
+                oldest_wait = max(oldest_wait or 0.0, stats["oldest_wait_seconds"])
+        totals["branches"] = len(self.queues)
+        totals["by_priority"] = by_priority
+        totals["oldest_wait_seconds"] = oldest_wait
+        return totals
+
+    def serve(self, requests, replies):
+        """Handle requests until OP_STOP"""
+        idle = 0
+        while True:
+            payload = requests.get()
+            if payload is None:
+                idle += 1
+                _backoff(idle)
+                continue
+            idle = 0
+            request = marshal.loads(payload)
+            if request[0] == OP_STOP:
+                return
+            has_reply, reply = self.handle(request)
+            if has_reply:
+                payload = marshal.dumps(reply)
+                while not replies.put(payload):
+                    time.sleep(0)
+
+
+def _attach(channel, capacity):
+    """Worker's end of a channel: a ring is passed by name, a QueueChannel as is"""
+    if isinstance(channel, str):
+        return ShmRingBuffer(channel, capacity)
+    return channel
+
+
+def _run_worker(shard, request_channel, reply_channel, capacity, aging):
+    requests = _attach(request_channel, capacity)
+    replies = _attach(reply_channel, capacity)
+    try:
+        ShardWorker(shard, aging).serve(requests, replies)
+    finally:
+        requests.close()
+        replies.close()
+
+
+class ShardedOrderQueue:
+    """Coordinator for per-branch order queues spread over worker processes
+
+    Not thread-safe: call it from one thread, as each ring has one producer
+    and one consumer.
+    """
+    # Adds sent to a shard in one message
+    ADD_BATCH = 256
+    # Upper bound on the marshal bytes of an add besides its two strings
+    ADD_OVERHEAD = 64
+
+    def __init__(self, shards=None, aging=None, ring_bytes=1 << 22, start_method=None):
+        self.shards = shards or multiprocessing.cpu_count()
+        context = multiprocessing.get_context(start_method)
+
+        self.next_ids = defaultdict(lambda: FIRST_ORDER_ID)  # branch -> next order_id
+        self.pending_adds = [[] for _ in range(self.shards)]
+        self.pending_bytes = [0] * self.shards  # Upper bound on each batch's marshal size
+        # Largest message the rings take, less room for the batch's own framing
+        self.max_batch_bytes = ring_bytes // 2 - self.ADD_OVERHEAD
+        # Reply-bearing requests sent / replies read per shard, and replies
+        # read ahead of the caller that waits for them (ticket -> reply)
+        self.sent = [0] * self.shards
+        self.received = [0] * self.shards
+        self.replies = [{} for _ in range(self.shards)]
+
+        self.request_rings = []
+        self.reply_rings = []
+        self.workers = []
+        try:
+            for shard in range(self.shards):
+                self.request_rings.append(self._channel(context, ring_bytes))
+                self.reply_rings.append(self._channel(context, ring_bytes))
+                worker = context.Process(
+                    target=_run_worker, name=f"order-shard-{shard}", daemon=True,
+                    args=(shard, self._worker_end(self.request_rings[-1]),
+                          self._worker_end(self.reply_rings[-1]), ring_bytes, aging),
+                )
+                # Raises if the arguments cannot be pickled for the start method
+                worker.start()
+                self.workers.append(worker)
+        except BaseException:
+            # Stop the workers already started and free every ring created
+            self.close()
+            raise
+
+    @staticmethod
+    def _channel(context, capacity):
+        if ORDERED_STORES:
+            return ShmRingBuffer(capacity=capacity)
+        return QueueChannel(context, capacity)
+
+    @staticmethod
+    def _worker_end(channel):
+        """What to pass a worker for a channel; see _attach()"""
+        return channel.name if isinstance(channel, ShmRingBuffer) else channel
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def shard_for(self, branch):
+        return shard_for(branch, self.shards)
+
+    def _send(self, shard, request):
+        payload = marshal.dumps(request)
+        ring = self.request_rings[shard]
+        idle = 0
+        while not ring.put(payload):
+            # Read replies meanwhile, or a worker blocked on a full reply
+            # ring could never make room here
+            self._read_replies(shard)
+            self._check_alive(shard)
+            idle += 1
+            _backoff(idle)
+
+    def _request(self, shard, request):
+        """Send a request that has a reply; returns its ticket"""
+        self._flush(shard)
+        self._send(shard, request)
+        ticket = self.sent[shard]
+        self.sent[shard] += 1
+        return ticket
+
+    def _read_replies(self, shard):
+        ring = self.reply_rings[shard]
+        while True:
+            payload = ring.get()
+            if payload is None:
+                return
+            self.replies[shard][self.received[shard]] = marshal.loads(payload)
+            self.received[shard] += 1
+
+    def _result(self, shard, ticket):
+        """Wait for the reply to a request"""
+        replies = self.replies[shard]
+        idle = 0
+        while ticket not in replies:
+            self._read_replies(shard)
+            if ticket in replies:
+                break
+            self._check_alive(shard)
+            idle += 1
+            _backoff(idle)
+        return replies.pop(ticket)
+
+    def _check_alive(self, shard):
+        worker = self.workers[shard]
+        if not worker.is_alive():
+            raise RuntimeError(f"shard {shard} worker exited with code {worker.exitcode}")
+
+    def _flush(self, shard):
+        """Send the adds buffered for a shard"""
+        adds = self.pending_adds[shard]
+        if adds:
+            self._send(shard, (OP_ADD, adds))
+            self.pending_adds[shard] = []
+            self.pending_bytes[shard] = 0
+
+    def flush(self):
+        """Send every buffered add"""
+        for shard in range(self.shards):
+            self._flush(shard)
+
+    def add_order(self, branch, items, priority=PRIORITY_NORMAL):
+        """Queue an order at a branch and return its order ID
+
+        The add is buffered and sent with the next adds for the same shard,
+        in batches of up to ADD_BATCH adds or half a ring, or before any
+        request to that shard that reads from it. Raises ValueError if the
+        order is too large to fit in a ring message on its own.
+        """
+        size = self.ADD_OVERHEAD + _utf8_size(branch) + _utf8_size(items)
+        if size > self.max_batch_bytes:
+            raise ValueError(f"order of {size} bytes is too large for the shard rings")
+        shard = self.shard_for(branch)
+        if self.pending_bytes[shard] + size > self.max_batch_bytes:
+            self._flush(shard)
+
+        order_id = self.next_ids[branch]
+        self.next_ids[branch] = order_id + 1
+        adds = self.pending_adds[shard]
+        adds.append((branch, order_id, items, priority))
+        self.pending_bytes[shard] += size
+        if len(adds) >= self.ADD_BATCH:
+            self._flush(shard)
+        return order_id
+
+    def add_orders(self, orders):
+        """Queue (branch, items, priority) orders, returning their order IDs"""
+        return [self.add_order(branch, items, priority) for branch, items, priority in orders]
+
+    def dispatch(self, branch, n=1):
+        """Dispatch up to n orders of a branch as (order_id, items, priority, wait_seconds)"""
+        shard = self.shard_for(branch)
+        return self._result(shard, self._request(shard, (OP_DISPATCH, branch, n)))
+
+    def dispatch_many(self, branches, n=1):
+        """Dispatch up to n orders at each branch, with all shards working at once
+
+        Returns {branch: orders} with orders as dispatch() returns them.
+        """
+        tickets = {}
+        for branch in branches:
+            shard = self.shard_for(branch)
+            tickets[branch] = (shard, self._request(shard, (OP_DISPATCH, branch, n)))
+        return {branch: self._result(shard, ticket) for branch, (shard, ticket) in tickets.items()}
+
+    def cancel(self, branch, order_id):
+        """Cancel a queued order; False if it is not queued"""
+        shard = self.shard_for(branch)
+        return self._result(shard, self._request(shard, (OP_CANCEL, branch, order_id)))
+
+    def shard_stats(self):
+        """Each shard's counters, asked of all workers at once"""
+        tickets = [self._request(shard, (OP_STATS,)) for shard in range(self.shards)]
+        return [self._result(shard, ticket) for shard, ticket in enumerate(tickets)]
+
+    def stats(self):
+        """Counters across every shard, shaped like OrderQueueManager.stats()"""
+        shards = self.shard_stats()
+        oldest = [s["oldest_wait_seconds"] for s in shards if s["oldest_wait_seconds"] is not None]
+        stats = {
+            key: sum(s[key] for s in shards)
+            for key in ("total", "enqueued_total", "dispatched_total", "cancelled_total", "branches")
+        }
+        stats["by_priority"] = {
+            name: sum(s["by_priority"][level] for s in shards)
+            for level, name in enumerate(PRIORITY_NAMES)
+        }
+        stats["oldest_wait_seconds"] = max(oldest, default=None)
+        stats["shards"] = shards
+        return stats
+
+    def close(self):
+        """Stop the workers and free the rings
+
+        Buffered adds that cannot be sent are dropped; the workers are
+        stopped and the shared memory freed even if a worker has died.
+        """
+        if not self.request_rings:
+            return
+        try:
+            for shard, worker in enumerate(self.workers):
+                if worker.is_alive():
+                    try:
+                        self._flush(shard)
+                    except ValueError:
+                        self.pending_adds[shard] = []
+                        self.pending_bytes[shard] = 0
+                    self._send(shard, (OP_STOP,))
+        finally:
+            for worker in self.workers:
+                worker.join(5)
+                if worker.is_alive():
+                    worker.terminate()
+                    worker.join()
+            for ring in self.request_rings + self.reply_rings:
+                ring.close()
+            self.workers = []
+            self.request_rings = []
+            self.reply_rings = []
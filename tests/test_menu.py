@@ -0,0 +1,45 @@
+"""Parsing of free-text order items"""
+import pytest
+
+from order_queue import MenuCatalog, split_quantity
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Burger", ("Burger", 1)),
+    ("2x Burger", ("Burger", 2)),
+    ("2 x Burger", ("Burger", 2)),
+    ("3X Fries", ("Fries", 3)),
+    ("Burger x2", ("Burger", 2)),
+    ("Burger x 2", ("Burger", 2)),
+    ("2× Burger", ("Burger", 2)),
+    # A bare leading number is part of the name
+    ("7 Up", ("7 Up", 1)),
+    ("7 Up x3", ("7 Up", 3)),
+    ("0x Burger", ("0x Burger", 1)),
+    ("Burger x0", ("Burger x0", 1)),
+    ("Xbox Meal", ("Xbox Meal", 1)),
+])
+def test_split_quantity(text, expected):
+    assert split_quantity(text) == expected
+
+
+def test_parse_sums_repeats_ignoring_case_and_spacing():
+    menu = MenuCatalog()
+    items, lines = menu.parse("2x Burger, fries,  burger ,Fries x3")
+    assert items == "2x Burger, fries,  burger ,Fries x3"
+    assert [(menu.name(item_id), qty) for item_id, qty in lines] == [("Burger", 3), ("fries", 4)]
+    assert menu.format(lines) == "3x Burger, 4x fries"
+
+
+def test_parse_is_cached_and_shares_the_string():
+    menu = MenuCatalog()
+    first = menu.parse("Burger, Cola")
+    assert menu.parse("Burger, Cola") is first
+
+
+def test_full_catalog_keeps_new_names_as_text():
+    menu = MenuCatalog(["Burger"], max_items=2)
+    _, lines = menu.parse("Burger, Cola, Tea  Latte x2")
+    assert len(menu) == 2
+    assert lines[2] == ("Tea Latte", 2)
+    assert menu.format(lines) == "Burger, Cola, 2x Tea Latte"
@@ -0,0 +1,120 @@
+"""Dispatch order and windowed iteration of OrderQueueManager"""
+import random
+import types
+
+import pytest
+
+import columnar_queue
+import order_queue
+from columnar_queue import ColumnarOrderQueueManager
+from order_queue import OrderQueueManager, PRIORITY_BULK, PRIORITY_NORMAL, PRIORITY_VIP, linear_aging
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Freeze the queues' monotonic clock; advance it with clock.advance(seconds)"""
+    now = [10 ** 12]
+    fake = types.SimpleNamespace(
+        monotonic_ns=lambda: now[0],
+        time=lambda: order_queue.monotonic_ns_to_epoch(now[0]),
+        advance=lambda seconds: now.__setitem__(0, now[0] + int(seconds * 1e9)),
+    )
+    monkeypatch.setattr(order_queue, "time", fake)
+    monkeypatch.setattr(columnar_queue, "time", fake)
+    return fake
+
+
+def order_ids(orders):
+    return [order.order_id for order in orders]
+
+
+def churn(manager, clock, steps, deadlines=False):
+    """Random adds, dispatches, cancels and promotes, with time passing"""
+    rng = random.Random(7)
+    manager.add_order("Burger")
+    for _ in range(steps):
+        clock.advance(rng.uniform(0, 0.02))
+        r = rng.random()
+        if r < 0.5:
+            kwargs = {}
+            if deadlines:
+                kwargs = {"deadline": clock.time() + rng.uniform(-1, 5), "prep_seconds": rng.choice([0, 0.5, 2])}
+            manager.add_order("Burger", priority=rng.randrange(4), **kwargs)
+        elif r < 0.65:
+            manager.process_next_order()
+        elif r < 0.8:
+            manager.cancel(rng.randrange(1001, manager.next_order_id))
+        else:
+            manager.promote(rng.randrange(1001, manager.next_order_id), rng.randrange(4))
+
+
+MODES = [
+    pytest.param(OrderQueueManager, {}, id="priority"),
+    pytest.param(OrderQueueManager, {"aging": linear_aging(0.5)}, id="aging"),
+    pytest.param(OrderQueueManager, {"aging": linear_aging(0.3, max_boost=2)}, id="capped-aging"),
+    pytest.param(OrderQueueManager, {"scheduling": "edf", "overdue_limit": 1}, id="edf"),
+    pytest.param(ColumnarOrderQueueManager, {}, id="columnar"),
+    pytest.param(ColumnarOrderQueueManager, {"aging": linear_aging(0.5)}, id="columnar-aging"),
+]
+
+
+@pytest.mark.parametrize("cls, kwargs", MODES)
+def test_windows_match_get_queue(clock, cls, kwargs):
+    manager = cls(**kwargs)
+    churn(manager, clock, 3000, deadlines=kwargs.get("scheduling") == "edf")
+    queue = order_ids(manager.get_queue())
+    assert sorted(queue) == sorted(order_ids(manager.get_queue()))
+    assert len(queue) == len(manager) > 100
+    n = len(queue)
+    for start, stop in [(0, 1), (0, 10), (5, 40), (n // 2, n // 2 + 25), (n - 7, n), (n - 3, n + 5), (n, n + 1)]:
+        assert order_ids(manager.iter_orders(start, stop)) == queue[start:stop], (start, stop)
+    assert order_ids(manager.peek(3)) == queue[:3]
+
+
+@pytest.mark.parametrize("cls, kwargs", MODES)
+def test_dispatch_follows_get_queue(clock, cls, kwargs):
+    manager = cls(**kwargs)
+    churn(manager, clock, 1500, deadlines=kwargs.get("scheduling") == "edf")
+    queue = order_ids(manager.get_queue())
+    assert order_ids(manager.process_batch(len(queue))) == queue
+    assert manager.is_empty()
+
+
+def test_windows_survive_compaction(clock):
+    manager = OrderQueueManager()
+    orders = [manager.add_order("Burger", priority=i % 4) for i in range(3000)]
+    for order in orders[::3] + orders[1::3]:
+        manager.cancel(order.order_id)
+    assert manager.tombstones < len(manager)  # Cancelling compacted the lanes
+    queue = order_ids(manager.get_queue())
+    assert order_ids(manager.iter_orders(100, 150)) == queue[100:150]
+
+
+def test_iteration_stops_when_the_queue_changes():
+    manager = OrderQueueManager()
+    for _ in range(5):
+        manager.add_order("Burger")
+    orders = manager.iter_orders(0, 5)
+    next(orders)
+    manager.add_order("Fries")
+    with pytest.raises(RuntimeError):
+        next(orders)
+
+
+def test_promote_with_aging_keeps_the_wait(clock):
+    manager = OrderQueueManager(aging=linear_aging(60))
+    order = manager.add_order("Burger", priority=PRIORITY_BULK)
+    clock.advance(90)
+    before = manager.effective_priority(order)
+    manager.promote(order.order_id, PRIORITY_NORMAL)
+    assert manager.effective_priority(order) == before - 1
+
+
+def test_promote_never_moves_the_deadline_back(clock):
+    manager = OrderQueueManager()
+    order = manager.add_order("Burger", priority=PRIORITY_VIP)
+    due = order.due_ns
+    manager.promote(order.order_id, PRIORITY_BULK)
+    assert order.due_ns == due
+    manager.promote(order.order_id, PRIORITY_VIP)
+    assert order.due_ns == due
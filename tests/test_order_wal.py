@@ -0,0 +1,88 @@
+"""Recovery of the order queue from the write-ahead log"""
+from order_queue import OrderQueueManager, PRIORITY_BULK, PRIORITY_VIP
+from order_wal import OrderWAL
+
+
+def queued(manager):
+    return [(order.order_id, order.items, order.priority) for order in manager.get_queue()]
+
+
+def recover(path, **kwargs):
+    manager = OrderQueueManager()
+    wal = OrderWAL(path, **kwargs)
+    wal.recover(manager)
+    return manager, wal
+
+
+def test_recover_replays_the_log(tmp_path):
+    path = str(tmp_path / "orders.wal")
+    manager, wal = recover(path)
+    manager.add_order("Burger")
+    fries = manager.add_order("Fries")
+    manager.add_order("Cola", priority=PRIORITY_BULK)
+    manager.cancel(fries.order_id)
+    manager.promote(1003, PRIORITY_VIP)
+    manager.process_next_order()
+    expected = queued(manager)
+    wal.close()
+
+    restored, wal = recover(path)
+    assert queued(restored) == expected
+    assert restored.next_order_id == manager.next_order_id
+    wal.close()
+
+
+def test_recover_drops_a_torn_tail(tmp_path):
+    path = str(tmp_path / "orders.wal")
+    manager, wal = recover(path)
+    manager.add_order("Burger")
+    manager.add_order("Fries")
+    expected = queued(manager)
+    wal.close()
+    # A crash in the middle of writing the next record
+    with open(path, "ab") as f:
+        f.write(b'{"op":"add","id":1003,"items":"Co')
+
+    restored, wal = recover(path)
+    assert queued(restored) == expected
+    # The torn record is gone, so the next one follows the last good record
+    restored.add_order("Tea")
+    wal.close()
+    restored, wal = recover(path)
+    assert [order_id for order_id, _, _ in queued(restored)] == [1001, 1002, 1003]
+    wal.close()
+
+
+def test_recover_from_a_snapshot_and_the_log_after_it(tmp_path):
+    path = str(tmp_path / "orders.wal")
+    manager, wal = recover(path, snapshot_every=4)
+    for items in ("Burger", "Fries", "Cola", "Tea"):
+        manager.add_order(items)
+    # The fourth record wrote a snapshot and truncated the log
+    with open(path, "rb") as f:
+        assert f.read() == b""
+    manager.cancel(1002)
+    manager.add_order("Cake", priority=PRIORITY_VIP)
+    expected = queued(manager)
+    wal.close()
+
+    restored, wal = recover(path, snapshot_every=4)
+    assert queued(restored) == expected
+    assert restored.next_order_id == 1006
+    wal.close()
+
+
+def test_recover_keeps_creation_times(tmp_path):
+    path = str(tmp_path / "orders.wal")
+    manager, wal = recover(path, snapshot_every=2)
+    manager.add_order("Burger")
+    manager.add_order("Fries")
+    manager.add_order("Cola")
+    expected = {order.order_id: (order.created_at, round(order.deadline, 3))
+                for order in manager.get_queue()}
+    wal.close()
+
+    restored, wal = recover(path)
+    assert {order.order_id: (order.created_at, round(order.deadline, 3))
+            for order in restored.get_queue()} == expected
+    wal.close()
@@ -0,0 +1,69 @@
+"""Shared-memory rings of the sharded queue"""
+import pytest
+
+import sharded_queue
+from sharded_queue import ShmRingBuffer
+
+pytestmark = pytest.mark.skipif(not sharded_queue.ORDERED_STORES,
+                                reason="ShmRingBuffer needs x86 store ordering")
+
+
+@pytest.fixture
+def ring():
+    ring = ShmRingBuffer(capacity=256)
+    yield ring
+    ring.close()
+
+
+def test_messages_come_back_in_order_across_the_wrap(ring):
+    sent = []
+    received = []
+    for i in range(200):
+        payload = bytes([i % 256]) * (i % 37)
+        while not ring.put(payload):
+            received.append(ring.get())
+        sent.append(payload)
+        # Fall behind a little so the writes keep crossing the end of the buffer
+        if i % 3 == 0:
+            received.append(ring.get())
+    while True:
+        payload = ring.get()
+        if payload is None:
+            break
+        received.append(payload)
+    assert received == sent
+    assert ring.counters[ring.TAIL] > 4 * ring.capacity
+
+
+def test_put_refuses_when_full(ring):
+    assert ring.get() is None
+    payload = b"x" * 60  # 64 bytes with its length
+    for _ in range(4):
+        assert ring.put(payload)
+    assert not ring.put(payload)
+    assert ring.get() == payload
+    assert ring.put(payload)
+
+
+def test_message_wrapped_to_the_front(ring):
+    # Leave 48 bytes before the end, then send a message that needs 64
+    assert ring.put(b"a" * 100) and ring.put(b"b" * 100)
+    assert ring.get() == b"a" * 100
+    assert ring.put(b"c" * 60)
+    assert ring.get() == b"b" * 100
+    assert ring.get() == b"c" * 60
+    assert ring.get() is None
+
+
+def test_oversized_message_is_rejected(ring):
+    with pytest.raises(ValueError):
+        ring.put(b"x" * 200)
+
+
+def test_worker_end_attaches_by_name(ring):
+    other = ShmRingBuffer(ring.name, ring.capacity)
+    try:
+        assert ring.put(b"hello")
+        assert other.get() == b"hello"
+    finally:
+        other.close()